@@ -0,0 +1,147 @@
+import numpy as np
+
+from calculator_parser import NestedExpression, ParsedExpression, parse
+from calculator_plan import compile_plan
+
+# Batch evaluation is float64 only: whatever the engine's number system,
+# literals are read and folded as floats. Use CalculatorEngine.evaluate or
+# the CLI for exact or decimal results.
+
+# Error texts a batch element can carry, indexed by BatchResult.codes
+ERRORS = (
+    "",
+    "INCOMPLETE EQUATION",
+    "DIVISION BY ZERO",
+    "INVALID OPERATOR SEQUENCE",
+    "SYNTAX ERROR",
+    "NUMBER TOO LARGE",
+    "COMPLEX RESULT",
+    "INVALID INPUT",
+)
+_CODES = {message: code for code, message in enumerate(ERRORS)}
+DIVISION_BY_ZERO = _CODES["DIVISION BY ZERO"]
+NUMBER_TOO_LARGE = _CODES["NUMBER TOO LARGE"]
+
+
+class BatchResult:
+    """Float64 results of a batch with a per-element error mask
+
+    values holds NaN wherever mask is set; codes indexes ERRORS to say why.
+    """
+
+    __slots__ = ('values', 'mask', 'codes')
+
+    def __init__(self, values, codes):
+        self.values = values
+        self.codes = codes
+        self.mask = codes != 0
+
+    def errors(self):
+        """Error text per element, empty where the element evaluated"""
+        return np.array(ERRORS, dtype=object)[self.codes]
+
+    def formatted(self):
+        """Display text per element: format_number output or the error text"""
+        values = self.values
+        out = self.errors()
+        ok = ~self.mask
+        # Whole numbers print without decimals, like format_number
+        whole = ok & np.isfinite(values) & (values == np.floor(values))
+        fractional = ok & ~whole
+        if whole.any():
+            out[whole] = np.char.mod('%d', values[whole])
+        if fractional.any():
+            # '%.3f' rounds exactly like round(num, 3) followed by f"{:.3f}"
+            text = np.char.mod('%.3f', values[fractional])
+            out[fractional] = np.char.rstrip(np.char.rstrip(text, '0'), '.')
+        return out
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _finish(values, codes):
+    """Apply the overflow check and blank out failed elements"""
+    with np.errstate(invalid='ignore'):
+        too_large = (np.abs(values) > 1e100) & (codes == 0)
+    codes[too_large] = NUMBER_TOO_LARGE
+    values[codes != 0] = np.nan
+    return BatchResult(values, codes)
+
+
+def _fold_arrays(expression, operands, codes):
+    """Evaluate operand arrays in the shape of expression, flagging elements that divide by zero"""
+    def divide(dividend, divisor):
+        codes[(divisor == 0) & (codes == 0)] = DIVISION_BY_ZERO
+        return dividend / divisor
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        return expression.apply(operands, divide)
+
+
+def compile_template(template, names=('x',)):
+    """Compile a template such as x*1.08+3 once for repeated batch evaluation"""
+    return compile_plan(template, names)
+
+
+def evaluate_template(engine, template, **arrays):
+    """Evaluate one template over arrays bound to its variable names
+
+    The template is parsed once and folded as whole-array NumPy operations.
+    Static errors in the template raise as they do for a single equation;
+    errors that depend on the data are reported per element.
+    """
+    if not isinstance(template, (ParsedExpression, NestedExpression)):
+        template = compile_template(template, arrays)
+    bindings = {name: np.asarray(array, dtype=np.float64) for name, array in arrays.items()}
+    shape = np.broadcast_shapes(*(array.shape for array in bindings.values())) if bindings else ()
+    operands = []
+    too_large = False
+    for value in template.operands:
+        if value.__class__ is str:
+            operands.append(bindings[value])
+            continue
+        try:
+            operands.append(float(value))
+        except OverflowError:
+            # A literal beyond float range, which '=' reports as too large
+            too_large = True
+            operands.append(np.inf)
+    codes = np.zeros(shape, dtype=np.uint8)
+    values = np.broadcast_to(_fold_arrays(template, operands, codes), shape)
+    if too_large:
+        codes[codes == 0] = NUMBER_TOO_LARGE
+    # A template without variables still gives a one-element batch
+    return _finish(np.atleast_1d(np.array(values, dtype=np.float64)), np.atleast_1d(codes))
+
+
+def evaluate_column(engine, equations):
+    """Evaluate a column of independent equations
+
+    Equations are parsed one by one, then grouped by their structure, the
+    operator sequence and any parentheses, so each group is folded as
+    columns of a 2-D array instead of per row. Like every batch path this
+    is float64, whatever engine.numbers is.
+    """
+    count = len(equations)
+    values = np.full(count, np.nan)
+    codes = np.zeros(count, dtype=np.uint8)
+    groups = {}
+    for index, equation in enumerate(equations):
+        try:
+            parsed = parse(equation)
+            row = [float(value) for value in parsed.operands]
+        except Exception as e:
+            codes[index] = _CODES.get(engine.error_message(e), _CODES["INVALID INPUT"])
+            continue
+        group = groups.setdefault(parsed.structure(), (parsed, [], []))
+        group[1].append(index)
+        group[2].append(row)
+
+    for expression, indexes, rows in groups.values():
+        matrix = np.array(rows, dtype=np.float64)
+        group_codes = np.zeros(len(indexes), dtype=np.uint8)
+        result = _fold_arrays(expression, list(matrix.T), group_codes)
+        values[indexes] = result
+        codes[indexes] = group_codes
+    return _finish(values, codes)
@@ -0,0 +1,337 @@
+import argparse
+import gc
+import importlib.util
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from calculator_convert import to_fraction
+from calculator_engine import CalculatorEngine
+from calculator_numbers import FLOAT, NUMBERS
+from calculator_parser import IncrementalExpression
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Results the suite is compared against unless --baseline says otherwise
+BASELINE_PATH = os.path.join(HERE, 'bench_baseline.json')
+# Fixed seed so every run times the same inputs
+SEED = 2024
+
+
+def _expressions(rng, count, terms, operators='+-*/'):
+    """Random valid equations of the given number of terms"""
+    equations = []
+    for _ in range(count):
+        parts = [str(rng.randint(1, 999))]
+        for _ in range(terms - 1):
+            parts.append(rng.choice(operators))
+            parts.append(str(rng.randint(1, 999)))
+        equations.append(''.join(parts))
+    return equations
+
+
+def _decimal_expressions(rng, count, terms):
+    """Random valid equations of money-like decimals, such as 12.34*1.08"""
+    equations = []
+    for _ in range(count):
+        parts = [f"{rng.randint(1, 9999)}.{rng.randint(0, 99):02d}"]
+        for _ in range(terms - 1):
+            parts.append(rng.choice('+-*/'))
+            parts.append(f"{rng.randint(1, 999)}.{rng.randint(0, 99):02d}")
+        equations.append(''.join(parts))
+    return equations
+
+
+def _nested_expressions(rng, count, depth):
+    """Random equations with parentheses nested depth levels deep"""
+    equations = []
+    for _ in range(count):
+        equation = str(rng.randint(1, 999))
+        for _ in range(depth):
+            equation = f"({equation}{rng.choice('+-*/')}{rng.randint(1, 999)})"
+        equations.append(equation)
+    return equations
+
+
+def _error_expressions(rng, count):
+    """Equations failing each validation step, plus some that succeed"""
+    shapes = ['{a}/0', '{a}++{b}', '0{a}+{b}', '{a}*', '*{a}', '{a}/0.0', '{a}..{b}',
+              '{a}+{b}', '{a}/{b}-0']
+    return [rng.choice(shapes).format(a=rng.randint(1, 999), b=rng.randint(1, 999))
+            for _ in range(count)]
+
+
+def bench_evaluate(equations, cached=False, numbers=FLOAT):
+    engine = CalculatorEngine(numbers)
+
+    def run():
+        if not cached:
+            engine.cache.clear()
+        for equation in equations:
+            try:
+                engine.evaluate(equation, record=False)
+            except Exception as e:
+                engine.error_message(e)
+
+    return run, len(equations)
+
+
+def bench_typed_equals(equations):
+    """Keys pushed one at a time, then '=' as the GUI does it"""
+    engine = CalculatorEngine()
+    typed = IncrementalExpression()
+
+    def run():
+        for equation in equations:
+            typed.reset()
+            for char in equation:
+                typed.push(char)
+            try:
+                engine.accept(equation, typed.result(), record=False)
+            except Exception as e:
+                engine.error_message(e)
+
+    return run, len(equations)
+
+
+def bench_sweep(template, values):
+    """A what-if table from one compiled template"""
+    engine = CalculatorEngine()
+    plan = engine.compile(template)
+
+    def run():
+        for _ in engine.sweep(plan, x=values):
+            pass
+
+    return run, len(values)
+
+
+def bench_engine_method(name, arguments):
+    engine = CalculatorEngine()
+    method = getattr(engine, name)
+
+    def run():
+        for argument in arguments:
+            method(*argument)
+
+    return run, len(arguments)
+
+
+def bench_fraction(numbers):
+    def run():
+        for number in numbers:
+            to_fraction(number)
+
+    return run, len(numbers)
+
+
+def _load_gui():
+    """The calculator 1.2.py module, or None when Tk cannot open a display"""
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError:
+        return None
+    spec = importlib.util.spec_from_file_location('calculator_gui', os.path.join(HERE, 'calculator 1.2.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def bench_update_display(gui, keys):
+    calc = gui.Calculator(history_path=None)
+    calc.window.withdraw()
+
+    def run():
+        calc.click('CLR')
+        for key in keys:
+            calc.click(key)
+            # Draw now instead of waiting for the idle pass
+            calc.renderer.redraw()
+        calc.window.update_idletasks()
+
+    return run, len(keys)
+
+
+def bench_history_popup(gui, entries):
+    calc = gui.Calculator(history_path=None)
+    calc.window.withdraw()
+    history = calc.history
+    history.resize(entries)
+    for i in range(entries):
+        history.append(f"{i}+1", i + 1.0)
+
+    def run():
+        # Open, scroll a page and close
+        calc.show_history()
+        calc.history_view.yview('scroll', -1, 'pages')
+        calc.history_view.redraw()
+        calc.window.update_idletasks()
+        calc.show_history()
+
+    return run, 1
+
+
+def build_suite(include_gui=True):
+    """Map of benchmark name to a (function, operations per call) factory"""
+    rng = random.Random(SEED)
+    short = _expressions(rng, 1000, 3)
+    long = _expressions(rng, 20, 500)
+    errors = _error_expressions(rng, 1000)
+    numbers = [rng.choice([rng.randint(-10**6, 10**6), rng.uniform(-1e6, 1e6)]) for _ in range(1000)]
+    simple_fractions = [rng.randint(1, 999) / rng.randint(1, 999) for _ in range(1000)]
+    # Decimals with no small exact fraction walk every convergent
+    long_decimals = [rng.random() for _ in range(1000)]
+    big_pairs = [(rng.randint(1, 10**12), rng.randint(1, 10**12)) for _ in range(1000)]
+    decimals = _decimal_expressions(rng, 1000, 3)
+    nested = _nested_expressions(rng, 20, 500)
+
+    suite = {
+        'evaluate_short': lambda: bench_evaluate(short),
+        'evaluate_short_cached': lambda: bench_evaluate(short, cached=True),
+        'evaluate_long': lambda: bench_evaluate(long),
+        'evaluate_errors': lambda: bench_evaluate(errors),
+        'evaluate_nested': lambda: bench_evaluate(nested),
+        # The same table as evaluating each substituted equation
+        'sweep_plan': lambda: bench_sweep('x*1.08+12*3/4-x/7', range(1, 1001)),
+        'sweep_evaluate': lambda: bench_evaluate([f"{x}*1.08+12*3/4-{x}/7" for x in range(1, 1001)]),
+        'typed_equals': lambda: bench_typed_equals(short),
+        'format_number': lambda: bench_engine_method('format_number', [(n,) for n in numbers]),
+        'to_binary': lambda: bench_engine_method('to_binary', [(n,) for n in numbers]),
+        'to_fraction': lambda: bench_fraction(simple_fractions),
+        'to_fraction_long_decimals': lambda: bench_fraction(long_decimals),
+        'simplify_fraction': lambda: bench_engine_method('simplify_fraction', big_pairs),
+    }
+    # Cost per evaluation of each number system: integer equations stay on
+    # the int path, decimal literals exercise the rounding of every tier
+    for name, system in NUMBERS.items():
+        suite[f'evaluate_short_{name}'] = lambda system=system: bench_evaluate(short, numbers=system)
+        suite[f'evaluate_decimals_{name}'] = lambda system=system: bench_evaluate(decimals, numbers=system)
+    if include_gui:
+        gui = _load_gui()
+        if gui is None:
+            print("Skipping GUI benchmarks: no display, try xvfb-run", file=sys.stderr)
+        else:
+            keys = list('12+34*56-78/9.5' * 20)
+            suite['gui_update_display'] = lambda: bench_update_display(gui, keys)
+            suite['gui_history_popup'] = lambda: bench_history_popup(gui, 100000)
+    return suite
+
+
+def measure(run, ops, repeat=7, min_time=0.1):
+    """Best and median seconds per operation over repeat timed samples
+
+    Each sample calls run enough times to last at least min_time seconds.
+    Garbage collection is paused while timing, as timeit does.
+    """
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _measure(run, ops, repeat, min_time)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _measure(run, ops, repeat, min_time):
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2
+    samples = [elapsed]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            run()
+        samples.append(time.perf_counter() - started)
+    per_op = [sample / (number * ops) for sample in samples]
+    return {
+        'best_us': min(per_op) * 1e6,
+        'median_us': statistics.median(per_op) * 1e6,
+        'operations': number * ops * repeat,
+    }
+
+
+def run_suite(names=None, repeat=7, min_time=0.1, include_gui=True):
+    suite = build_suite(include_gui)
+    results = {}
+    for name, factory in suite.items():
+        if names and not any(part in name for part in names):
+            continue
+        run, ops = factory()
+        results[name] = measure(run, ops, repeat, min_time)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(report, baseline, threshold=0.25):
+    """Rows of (name, baseline us, current us, ratio, regressed) for shared benchmarks"""
+    rows = []
+    for name, result in report['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            continue
+        ratio = result['best_us'] / before['best_us']
+        rows.append((name, before['best_us'], result['best_us'], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the calculator's hot paths")
+    parser.add_argument('names', nargs='*', help="only run benchmarks whose name contains one of these")
+    parser.add_argument('--output', default='-', help="file for the JSON results (default: stdout)")
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help="results to compare against (default: bench_baseline.json)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="write the results to the baseline file instead of comparing")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="fail when a benchmark is this much slower than the baseline (default: 0.25)")
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help="seconds each timed sample lasts at least (default: 0.1)")
+    parser.add_argument('--no-gui', action='store_true', help="skip the Tk benchmarks")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.names, args.repeat, args.min_time, not args.no_gui)
+    text = json.dumps(report, indent=2, sort_keys=True) + '\n'
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return 0
+    if args.output == '-':
+        sys.stdout.write(text)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    if not os.path.exists(args.baseline):
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressed = False
+    for name, before, after, ratio, slower in compare(report, baseline, args.threshold):
+        regressed = regressed or slower
+        print(f"{name:28} {before:10.2f} us -> {after:10.2f} us  x{ratio:.2f}"
+              f"{'  REGRESSION' if slower else ''}", file=sys.stderr)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
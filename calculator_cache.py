@@ -0,0 +1,104 @@
+from collections import OrderedDict
+
+
+class CacheEntry:
+    """Parsed form, or None when it was evaluated as typed, and outcome of one equation"""
+
+    __slots__ = ('parsed', 'result', 'error')
+
+    def __init__(self, parsed, result, error=None):
+        self.parsed = parsed
+        self.result = result
+        self.error = error
+
+
+class ExpressionCache:
+    """Bounded LRU cache of evaluated equations keyed by the normalized equation
+
+    Evicts the least recently used entries once either the number of entries
+    exceeds max_entries or the total length of the cached equations exceeds
+    max_chars.
+    """
+
+    def __init__(self, max_entries=1024, max_chars=1_000_000):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.entries = OrderedDict()
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def normalize(self, equation):
+        """Surrounding whitespace never changes the outcome of an equation"""
+        return equation.strip()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def size(self, key, entry):
+        """Characters an entry counts against max_chars"""
+        return len(key)
+
+    def put(self, key, entry):
+        size = self.size(key, entry)
+        if size > self.max_chars or self.max_entries <= 0:
+            return
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.chars -= self.size(key, old)
+        self.entries[key] = entry
+        self.chars += size
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until both limits hold"""
+        entries = self.entries
+        while entries and (len(entries) > self.max_entries or self.chars > self.max_chars):
+            key, entry = entries.popitem(last=False)
+            self.chars -= self.size(key, entry)
+
+    def resize(self, max_entries=None, max_chars=None):
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if max_chars is not None:
+            self.max_chars = max_chars
+        self.evict()
+
+    def clear(self):
+        self.entries.clear()
+        self.chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class ConversionCache(ExpressionCache):
+    """Bounded LRU cache of BIN and FRACTION texts
+
+    Keys hold the conversion, the exact value with its type and the setting
+    that shapes the text (fractional digits or largest denominator), so a
+    changed setting never returns a stale text. Entries count their text
+    length against max_chars, since binary forms of large results are long.
+    """
+
+    def __init__(self, max_entries=256, max_chars=1_000_000):
+        super().__init__(max_entries, max_chars)
+
+    @staticmethod
+    def key(kind, number, setting):
+        return (kind, type(number), number, setting)
+
+    def size(self, key, entry):
+        return len(entry)
@@ -0,0 +1,156 @@
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from calculator_engine import CalculatorEngine
+from calculator_numbers import FLOAT, NUMBERS
+
+
+def read_equations(stream):
+    """Yield one equation per input line without holding the input in memory"""
+    for line in stream:
+        yield line.rstrip('\r\n')
+
+
+def evaluate_lines(engine, equations):
+    """Yield (equation, result, error) for each equation, as '=' would show it"""
+    for equation in equations:
+        if not equation.strip():
+            yield equation, "", None
+            continue
+        try:
+            yield equation, engine.evaluate(equation, record=False), None
+        except Exception as e:
+            yield equation, None, engine.error_message(e)
+
+
+def format_text(equation, result, error):
+    return error if error is not None else result
+
+
+def format_jsonl(equation, result, error):
+    if error is not None:
+        return json.dumps({"expression": equation, "error": error}, ensure_ascii=False)
+    return json.dumps({"expression": equation, "result": result}, ensure_ascii=False)
+
+
+FORMATS = {'text': format_text, 'jsonl': format_jsonl}
+
+
+def write_lines(lines, out, buffer_lines=4096):
+    """Write lines to out in bulk, one write call per buffer_lines lines"""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= buffer_lines:
+            buffer.append('')
+            out.write('\n'.join(buffer))
+            buffer.clear()
+    if buffer:
+        buffer.append('')
+        out.write('\n'.join(buffer))
+    out.flush()
+
+
+def run(stream, out, output_format='text', buffer_lines=4096, engine=None):
+    """Evaluate every line of stream and write the results to out"""
+    engine = engine or CalculatorEngine()
+    formatter = FORMATS[output_format]
+    results = evaluate_lines(engine, read_equations(stream))
+    write_lines((formatter(*row) for row in results), out, buffer_lines)
+
+
+# Engine owned by each worker process of the parallel mode
+_worker_engine = None
+
+
+def _init_worker(numbers_name='float'):
+    global _worker_engine
+    _worker_engine = CalculatorEngine(NUMBERS[numbers_name])
+
+
+def _evaluate_chunk(chunk, output_format):
+    """Evaluate a chunk of equations in a worker and return its output text"""
+    formatter = FORMATS[output_format]
+    lines = [formatter(*row) for row in evaluate_lines(_worker_engine, chunk)]
+    lines.append('')
+    return '\n'.join(lines)
+
+
+def read_chunks(stream, chunk_lines):
+    """Group input lines into lists of at most chunk_lines equations"""
+    equations = read_equations(stream)
+    while True:
+        chunk = list(islice(equations, chunk_lines))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_parallel(stream, out, output_format='text', workers=None, chunk_lines=10000, numbers=FLOAT):
+    """Evaluate stream in chunks across worker processes, keeping input order
+
+    At most two chunks per worker are in flight, so memory stays bounded
+    no matter how large the input is.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(numbers.name,)) as pool:
+        pending = deque()
+        for chunk in read_chunks(stream, chunk_lines):
+            pending.append(pool.submit(_evaluate_chunk, chunk, output_format))
+            if len(pending) >= workers * 2:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+    out.flush()
+
+
+def _at_least(minimum):
+    """argparse type for an integer option that may not be below minimum"""
+    def integer(text):
+        value = int(text)
+        if value < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {value}")
+        return value
+    return integer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Evaluate calculator expressions line by line without the GUI")
+    parser.add_argument('input', nargs='?', default='-',
+                        help="file of expressions, one per line (default: stdin)")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='text',
+                        help="output format (default: text)")
+    parser.add_argument('--buffer-lines', type=_at_least(1), default=4096,
+                        help="number of output lines per write (default: 4096)")
+    parser.add_argument('--workers', type=_at_least(0), default=1,
+                        help="worker processes, 0 for one per CPU (default: 1, no pool)")
+    parser.add_argument('--chunk-lines', type=_at_least(1), default=10000,
+                        help="expressions per worker task (default: 10000)")
+    parser.add_argument('--numbers', choices=sorted(NUMBERS), default='float',
+                        help="float, exact fractions or decimals to 28, 50 or 100 digits (default: float)")
+    args = parser.parse_args(argv)
+
+    if args.input == '-':
+        stream = sys.stdin
+    else:
+        stream = open(args.input, encoding='utf-8', buffering=1 << 20)
+    try:
+        numbers = NUMBERS[args.numbers]
+        if args.workers == 1:
+            run(stream, sys.stdout, args.format, args.buffer_lines, CalculatorEngine(numbers))
+        else:
+            run_parallel(stream, sys.stdout, args.format, args.workers, args.chunk_lines, numbers)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
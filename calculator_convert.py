@@ -0,0 +1,168 @@
+import math
+
+MAX_DENOMINATOR = 1000000
+
+
+def rational(number, max_denominator=MAX_DENOMINATOR):
+    """Smallest-denominator fraction that is exactly the given number
+
+    Walks the continued-fraction convergents of the exact binary value of a
+    float, which are its best rational approximations, and returns the first
+    one that converts back to the same float. Integers and Fractions are
+    already exact. Returns (numerator, denominator), or None when no
+    convergent within max_denominator is exact. Takes O(log denominator)
+    steps.
+    """
+    if isinstance(number, int):
+        return number, 1
+    if not isinstance(number, float):
+        numerator = getattr(number, 'numerator', None)
+        if isinstance(numerator, int):
+            # Exact rationals such as fractions.Fraction
+            if number.denominator > max_denominator:
+                return None
+            return numerator, number.denominator
+        number = float(number)
+    if number.is_integer():
+        return int(number), 1
+
+    n, d = number.as_integer_ratio()
+    # Convergents p/q built from the continued-fraction terms of n/d
+    p0, q0, p1, q1 = 0, 1, 1, 0
+    while d:
+        a, r = divmod(n, d)
+        p0, q0, p1, q1 = p1, q1, a * p1 + p0, a * q1 + q0
+        if q1 > max_denominator:
+            return None
+        if p1 / q1 == number:
+            return p1, q1
+        n, d = d, r
+    return p1, q1
+
+
+def to_fraction(number, max_denominator=MAX_DENOMINATOR):
+    """Convert a number to fraction representation"""
+    try:
+        # Handle special cases
+        if number == 0:
+            return "0/1"
+
+        # Check if number is too large
+        if abs(number) > 1e10:
+            return "NUMBER TOO LARGE"
+
+        fraction = rational(number, max_denominator)
+        if fraction is None:
+            return "FRACTION TOO COMPLEX"
+        num, den = fraction
+
+        # If result is a whole number after simplification
+        if den == 1:
+            return str(num)
+
+        return f"{num}/{den}"
+
+    except Exception:
+        # Values with no fraction, such as NaN
+        return "CANNOT CONVERT TO FRACTION"
+
+
+def to_fractions(numbers, max_denominator=MAX_DENOMINATOR):
+    """Convert a column of numbers, converting each distinct value once"""
+    seen = {}
+    out = []
+    for number in numbers:
+        text = seen.get(number)
+        if text is None:
+            text = seen[number] = to_fraction(number, max_denominator)
+        out.append(text)
+    return out
+
+
+DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+BASE_NAMES = {2: 'BINARY', 8: 'OCTAL', 16: 'HEX'}
+# Bases with a C-level integer formatter
+_FORMATS = {2: 'b', 8: 'o', 16: 'X'}
+
+
+def _exact_ratio(number):
+    """Exact (numerator, denominator) of an int, float or Fraction"""
+    if isinstance(number, int):
+        return number, 1
+    if isinstance(number, float):
+        return number.as_integer_ratio()
+    numerator = getattr(number, 'numerator', None)
+    if isinstance(numerator, int):
+        return numerator, number.denominator
+    return float(number).as_integer_ratio()
+
+
+def _int_digits(n, base, width=0):
+    """Digits of a non-negative integer, zero padded to width
+
+    Large integers are split in halves around a power of the base, so the
+    cost is dominated by a few big divisions instead of one per digit.
+    """
+    if n < 1 << 64:
+        digits = []
+        while n:
+            n, digit = divmod(n, base)
+            digits.append(DIGITS[digit])
+        return ''.join(reversed(digits)).rjust(width, '0')
+    # Number of base digits in the low half
+    half = max(1, int(n.bit_length() / (2 * math.log2(base))))
+    high, low = divmod(n, base ** half)
+    return _int_digits(high, base, max(0, width - half)) + _int_digits(low, base, half)
+
+
+def to_base(number, base=2, frac_digits=8):
+    """Convert a number to any base from 2 to 36 including fractional digits
+
+    The fractional part is expanded exactly from the number's rational value
+    and truncated after frac_digits digits. A base outside 2..36 raises
+    ValueError; a number with no digits, such as NaN, gives a
+    CANNOT CONVERT message.
+    """
+    if not 2 <= base <= 36:
+        raise ValueError(f"base {base} outside 2..36")
+    try:
+        n, d = _exact_ratio(number)
+        is_negative = n < 0
+        int_part, frac = divmod(abs(n), d)
+
+        # Convert integer part
+        code = _FORMATS.get(base)
+        if code is not None:
+            int_digits = format(int_part, code)
+        elif int_part == 0:
+            int_digits = "0"
+        else:
+            int_digits = _int_digits(int_part, base)
+
+        # Convert fractional part one exact digit at a time
+        frac_digits_out = []
+        while frac and len(frac_digits_out) < frac_digits:
+            digit, frac = divmod(frac * base, d)
+            frac_digits_out.append(DIGITS[digit])
+
+        result = int_digits
+        if frac_digits_out:
+            result += "." + ''.join(frac_digits_out)
+        if is_negative:
+            result = "-" + result
+        return result
+
+    except Exception:
+        return f"CANNOT CONVERT TO {BASE_NAMES.get(base, f'BASE {base}')}"
+
+
+def to_bases(numbers, base=2, frac_digits=8):
+    """Convert a column of numbers to one base, converting each distinct value once"""
+    seen = {}
+    out = []
+    for number in numbers:
+        text = seen.get(number)
+        if text is None:
+            text = seen[number] = to_base(number, base, frac_digits)
+        out.append(text)
+    return out
@@ -0,0 +1,298 @@
+from decimal import Decimal
+from fractions import Fraction
+
+from calculator_cache import CacheEntry, ConversionCache, ExpressionCache
+from calculator_convert import MAX_DENOMINATOR, to_base, to_bases, to_fraction, to_fractions
+from calculator_history import History
+from calculator_numbers import EXACT, FLOAT, format_decimal
+from calculator_parser import parse
+from calculator_plan import VARIABLES, Plan, compile_plan
+
+# Keypad operators and the symbols shown for them on the display
+DISPLAY_SYMBOLS = str.maketrans({'*': '×', '/': '÷', '-': '−'})
+
+
+class CalculatorEngine:
+    """Headless calculator core: evaluation, validation, history and conversions"""
+
+    def __init__(self, numbers=FLOAT):
+        # Bounded store of past calculations, rendered only when shown
+        self.history = History(render=self.format_entry)
+        self.last_result = None
+        # Parsed forms and results of recently evaluated equations
+        self.cache = ExpressionCache()
+        # BIN and FRACTION texts of recent results
+        self.conversions = ConversionCache()
+        # Largest denominator FRACTION will show
+        self.max_denominator = MAX_DENOMINATOR
+        # Digits shown after the point by BIN and other base conversions
+        self.frac_digits = 8
+        # Behaviour calculator.py had before the engine was shared; its
+        # Calculator turns these on, calculator 1.2 keeps the defaults
+        # Evaluate a trailing point such as "5." instead of INCOMPLETE EQUATION
+        self.trailing_point = False
+        # Show whole numbers as "5/1" on FRACTION
+        self.whole_fractions = False
+        # BIN of a non-integer shows fractional bits, or DECIMALS NOT SUPPORTED
+        self.binary_fractions = True
+        # How literals are read and division is done, see calculator_numbers
+        self._numbers = numbers
+
+    @property
+    def numbers(self):
+        return self._numbers
+
+    @numbers.setter
+    def numbers(self, numbers):
+        """Switch number system; cached outcomes of the old one are dropped"""
+        if numbers is not self._numbers:
+            self._numbers = numbers
+            self.cache.clear()
+
+    def evaluate(self, equation, record=True):
+        """Evaluate an equation, record it in history and return the formatted result"""
+        return self.accept(equation, self.compute(equation), record)
+
+    def accept(self, equation, result, record=True):
+        """Check, store and format an already computed result of an equation"""
+        self.check_result(result)
+        # Store the numerical result for conversions
+        self.last_result = result
+        # Format the result
+        formatted_result = self.format_number(result)
+        # Add to history; display symbols are applied when it is shown
+        if record:
+            self.history.append(equation, result)
+        return formatted_result
+
+    def check_result(self, result):
+        """Raise the error shown for a result the display cannot take"""
+        # Check if result is too large
+        if abs(result) > 1e100:
+            raise OverflowError("NUMBER TOO LARGE")
+
+        # Check if result is complex or imaginary
+        if isinstance(result, complex):
+            raise ValueError("COMPLEX RESULT")
+
+    def compile(self, template, names=VARIABLES):
+        """Compile a template such as x*1.08+ANS into a reusable Plan"""
+        return compile_plan(template, names, self._numbers)
+
+    def run_plan(self, plan, **bindings):
+        """Run a Plan and return the formatted result; ANS defaults to the last result"""
+        if 'ANS' in plan.names and 'ANS' not in bindings:
+            bindings['ANS'] = self.previous_result()
+        result = plan.evaluate(bindings)
+        self.check_result(result)
+        return self.format_number(result)
+
+    def previous_result(self):
+        """The last result, which ANS stands for in templates"""
+        if self.last_result is None:
+            raise ValueError("NO PREVIOUS RESULT")
+        return self.last_result
+
+    def sweep(self, template, **ranges):
+        """What-if table: yield (values, text) for every combination of ranges
+
+        template is compiled once, or may already be a Plan. text is the
+        formatted result or the error message '=' would show, so a table
+        can be printed as it is produced. ANS is the last result unless it
+        is swept.
+        """
+        plan = template if isinstance(template, Plan) else self.compile(template)
+        if 'ANS' in plan.names and 'ANS' not in ranges:
+            ranges['ANS'] = (self.previous_result(),)
+        for values, result in plan.sweep(**ranges):
+            if not isinstance(result, Exception):
+                try:
+                    self.check_result(result)
+                except Exception as e:
+                    result = e
+            if isinstance(result, Exception):
+                yield values, self.error_message(result)
+            else:
+                yield values, self.format_number(result)
+
+    def compute(self, equation, evaluate=None):
+        """Return the raw result of an equation, reusing cached outcomes
+
+        On a cache miss the equation is parsed, unless evaluate is given: a
+        function returning the same result more cheaply, such as the
+        result() of the IncrementalExpression it was typed into.
+        """
+        key = self.cache.normalize(equation)
+        entry = self.cache.get(key)
+        if entry is None:
+            parsed = None
+            try:
+                if self.trailing_point and key.endswith('.'):
+                    # "5." is 5.0, as eval() read it. Past the checks that
+                    # ran before eval(), a point with no digit before it, as
+                    # in "." or "4-.", was a syntax error
+                    parsed = parse(key + '0', numbers=self._numbers)
+                    if not key[-2:-1].isdigit():
+                        raise SyntaxError("SYNTAX ERROR")
+                    result = parsed.evaluate()
+                elif evaluate is not None:
+                    result = evaluate()
+                else:
+                    # Tokenize, validate and evaluate without compiling Python code
+                    parsed = parse(key, numbers=self._numbers)
+                    result = parsed.evaluate()
+            except (ZeroDivisionError, SyntaxError, OverflowError, ValueError) as e:
+                self.cache.put(key, CacheEntry(None, None, e))
+                raise
+            self.cache.put(key, CacheEntry(parsed, result))
+            return result
+        if entry.error is not None:
+            raise type(entry.error)(*entry.error.args)
+        return entry.result
+
+    def error_message(self, error):
+        """Map an evaluation error to the text shown on the display"""
+        if isinstance(error, ZeroDivisionError):
+            return "DIVISION BY ZERO"
+        if isinstance(error, SyntaxError):
+            return "SYNTAX ERROR"
+        if isinstance(error, OverflowError):
+            return "NUMBER TOO LARGE"
+        if isinstance(error, ValueError):
+            return str(error)
+        return "INVALID INPUT"
+
+    def calculate(self, equation, record=True):
+        """Evaluate an equation and return the text to display, error or result"""
+        try:
+            return self.evaluate(equation, record)
+        except Exception as e:
+            self.last_result = None
+            return self.error_message(e)
+
+    def evaluate_template(self, template, **arrays):
+        """Evaluate a template such as x*1.08+3 over NumPy arrays in one pass, in float64"""
+        # NumPy is only needed for batch work, so import it on demand
+        from calculator_batch import evaluate_template
+        return evaluate_template(self, template, **arrays)
+
+    def evaluate_column(self, equations):
+        """Evaluate many independent equations as vectorized NumPy groups, in float64"""
+        from calculator_batch import evaluate_column
+        return evaluate_column(self, equations)
+
+    def format_entry(self, equation, result):
+        """History line for an equation and its result, with display symbols"""
+        return f"{self.display_symbols(equation)} = {self.format_number(result)}"
+
+    def display_symbols(self, equation):
+        """Translate keypad operators to the symbols shown on the display"""
+        return equation.translate(DISPLAY_SYMBOLS)
+
+    def to_binary(self, number, cached=False):
+        """Convert a number to binary representation including fractional parts
+
+        With cached the text is memoized, as the BIN button wants for the
+        result it was precomputed for; batch and server callers convert
+        many distinct values and skip the cache.
+        """
+        if not self.binary_fractions and not float(number).is_integer():
+            return "DECIMALS NOT SUPPORTED"
+        if not cached:
+            return to_base(number, 2, self.frac_digits)
+        key = self.conversions.key('bin', number, self.frac_digits)
+        text = self.conversions.get(key)
+        if text is None:
+            text = to_base(number, 2, self.frac_digits)
+            self.conversions.put(key, text)
+        return text
+
+    def to_base(self, number, base):
+        """Convert a number to any base from 2 to 36, see calculator_convert.to_base"""
+        return to_base(number, base, self.frac_digits)
+
+    def to_bases(self, numbers, base=2):
+        """Convert a whole column of results to one base"""
+        return to_bases(numbers, base, self.frac_digits)
+
+    def simplify_fraction(self, numerator, denominator):
+        """Simplify a fraction by finding the GCD"""
+        def gcd(a, b):
+            a, b = abs(a), abs(b)  # Work with absolute values
+            while b:
+                a, b = b, a % b
+            return a
+
+        # Special case for zero numerator
+        if numerator == 0:
+            return 0, 1
+
+        # Get GCD and simplify
+        divisor = gcd(numerator, denominator)
+        num = numerator // divisor
+        den = denominator // divisor
+
+        # If denominator is negative, move the negative sign to numerator
+        if den < 0:
+            num = -num
+            den = -den
+
+        return num, den
+
+    def to_fraction(self, number, cached=False):
+        """Convert a number to its exact fraction, see calculator_convert.rational
+
+        cached memoizes the text, as for to_binary. In exact mode an int or
+        Fraction result already is the fraction and is shown as it is, with
+        no size or denominator limit.
+        """
+        if self._numbers is EXACT and (number.__class__ is int or number.__class__ is Fraction):
+            if not number:
+                return "0/1"
+            if number.denominator == 1:
+                return f"{number}/1" if self.whole_fractions else str(number)
+            return f"{number.numerator}/{number.denominator}"
+        if self.whole_fractions and number and abs(number) <= 1e10 and float(number).is_integer():
+            return f"{int(number)}/1"
+        if not cached:
+            return to_fraction(number, self.max_denominator)
+        key = self.conversions.key('fraction', number, self.max_denominator)
+        text = self.conversions.get(key)
+        if text is None:
+            text = to_fraction(number, self.max_denominator)
+            self.conversions.put(key, text)
+        return text
+
+    def precompute_conversions(self, number):
+        """Fill the conversion cache for a result before BIN or FRACTION is pressed"""
+        self.to_binary(number, cached=True)
+        self.to_fraction(number, cached=True)
+
+    def to_fractions(self, numbers):
+        """Convert a whole column of results, such as the history, to fractions"""
+        return to_fractions(numbers, self.max_denominator)
+
+    def format_number(self, number):
+        """Format number to show 3 decimal places if decimal, whole number if integer
+
+        Decimal results are shown with every digit of their precision tier,
+        and outside float mode whole results with every digit they have.
+        """
+        if number.__class__ is Decimal:
+            return format_decimal(number)
+        if number.__class__ is int and self._numbers is not FLOAT:
+            return str(number)
+        try:
+            # Convert to float for checking decimal places
+            num = float(number)
+            # Check if it's effectively a whole number
+            if num.is_integer():
+                return str(int(num))
+            else:
+                # Round to 3 decimal places and remove trailing zeros
+                rounded = round(num, 3)
+                # Convert to string and remove trailing zeros if present
+                str_num = f"{rounded:.3f}".rstrip('0').rstrip('.')
+                return str_num
+        except:
+            return str(number)
@@ -0,0 +1,620 @@
+import os
+import queue
+import re
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+
+# Operators separating the operand tokens of an equation
+_SPLIT = re.compile(r'[-+*/]')
+# Popup queries: "=N" for a result, "A..B" for a result range
+_NUMBER = r'(-?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+))'
+_RESULT_QUERY = re.compile(r'\s*=\s*' + _NUMBER + r'\s*$')
+_RANGE_QUERY = re.compile(r'\s*' + _NUMBER + r'\s*\.\.\s*' + _NUMBER + r'\s*$')
+
+# Database the GUI keeps its history in between sessions
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.calculator_history.sqlite3')
+# Queued to make the writer commit without a caller waiting on it
+_COMMIT = 'commit'
+
+
+class HistoryEntry:
+    """Lightweight view of one stored calculation"""
+
+    __slots__ = ('equation', 'result', 'created', 'history')
+
+    def __init__(self, equation, result, created, history):
+        self.equation = equation
+        self.result = result
+        self.created = created
+        self.history = history
+
+    def __str__(self):
+        return self.history.render(self.equation, self.result)
+
+    def __repr__(self):
+        return f"HistoryEntry({self.equation!r}, {self.result!r})"
+
+
+class SortedChunks:
+    """Sorted sequence stored as a list of short sorted chunks
+
+    Inserting shifts one chunk instead of one large list, so it stays cheap
+    at millions of items; lookups bisect the chunk maxima, then the chunk.
+    """
+
+    CHUNK = 1000
+
+    def __init__(self, items=()):
+        items = sorted(items)
+        size = self.CHUNK
+        self.chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        self.maxes = [chunk[-1] for chunk in self.chunks]
+        self.length = len(items)
+
+    def add(self, item):
+        self.length += 1
+        if not self.chunks:
+            self.chunks.append([item])
+            self.maxes.append(item)
+            return
+        i = bisect_left(self.maxes, item)
+        if i == len(self.maxes):
+            i -= 1
+            self.chunks[i].append(item)
+            self.maxes[i] = item
+        else:
+            insort(self.chunks[i], item)
+        chunk = self.chunks[i]
+        if len(chunk) > 2 * self.CHUNK:
+            half = self.CHUNK
+            self.chunks[i:i + 1] = [chunk[:half], chunk[half:]]
+            self.maxes[i:i + 1] = [chunk[half - 1], chunk[-1]]
+
+    def iter_from(self, item):
+        """Items greater than or equal to item, in order"""
+        i = bisect_left(self.maxes, item)
+        if i == len(self.chunks):
+            return
+        chunk = self.chunks[i]
+        yield from chunk[bisect_left(chunk, item):]
+        for chunk in self.chunks[i + 1:]:
+            yield from chunk
+
+    def __len__(self):
+        return self.length
+
+
+class FullHistory:
+    """A History preceded by the older rows only its store still has
+
+    Indexes below older are read from the store a page at a time, so a
+    view scrolling through millions of rows reads only what it shows. The
+    store never deletes rows, so its ids are consecutive and an index maps
+    straight to an id: a page costs the same at the top or the bottom.
+    """
+
+    PAGE = 100
+
+    def __init__(self, history):
+        self.history = history
+        self.store = history.store
+        # Rows older than the oldest entry in memory are only on disk
+        before = history[0].created if history else float('inf')
+        self.first, self.end = self.store.id_range(before)
+        self.older = self.end - self.first
+        self.page_start = None
+        self.page = []
+
+    def __len__(self):
+        return self.older + len(self.history)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index >= self.older:
+            return self.history[index - self.older]
+        if index < 0:
+            raise IndexError("history index out of range")
+        start = index - index % self.PAGE
+        if start != self.page_start:
+            self.page = [HistoryEntry(equation, result, created, self.history)
+                         for created, equation, result in self.store.page(
+                             self.first + start, min(self.end, self.first + start + self.PAGE))]
+            self.page_start = start
+        return self.page[index - start]
+
+
+class HistoryIndex:
+    """Search indexes over a History, updated as entries are appended
+
+    Entries are identified by their sequence number. Results are kept sorted
+    for range lookups, distinct equations are kept sorted for prefix lookups
+    and every operand token maps to the equations containing it. Entries
+    that have left the ring buffer are skipped by queries.
+    """
+
+    def __init__(self, entries=()):
+        """Build the indexes in bulk from (seq, equation, result) triples"""
+        self.by_equation = {}
+        self.by_token = {}
+        results = []
+        for seq, equation, result in entries:
+            if result == result:  # NaN has no place in a sorted index
+                results.append((result, seq))
+            self.note_equation(seq, equation)
+        self.by_result = SortedChunks(results)
+        self.sorted_equations = SortedChunks(self.by_equation)
+
+    def note_equation(self, seq, equation):
+        """Record seq under its equation; True if the equation is new"""
+        seqs = self.by_equation.get(equation)
+        if seqs is not None:
+            seqs.append(seq)
+            return False
+        self.by_equation[equation] = [seq]
+        for token in set(_SPLIT.split(equation)):
+            self.by_token.setdefault(token, []).append(equation)
+        return True
+
+    def add(self, seq, equation, result):
+        if result == result:
+            self.by_result.add((result, seq))
+        if self.note_equation(seq, equation):
+            self.sorted_equations.add(equation)
+
+    def seqs_of(self, equations, first):
+        by_equation = self.by_equation
+        return {seq for equation in equations for seq in by_equation[equation] if seq >= first}
+
+    def prefix(self, prefix, first):
+        """Sequence numbers of live entries whose equation starts with prefix"""
+        matches = []
+        for equation in self.sorted_equations.iter_from(prefix):
+            if not equation.startswith(prefix):
+                break
+            matches.append(equation)
+        return self.seqs_of(matches, first)
+
+    def containing(self, text, first):
+        """Sequence numbers of live entries whose equation contains text"""
+        if _SPLIT.search(text):
+            equations = [equation for equation in self.by_equation if text in equation]
+        else:
+            # Operator-free text lies within one operand, so only tokens need scanning
+            equations = {equation for token, listed in self.by_token.items()
+                         if text in token for equation in listed}
+        return self.seqs_of(equations, first)
+
+    def results_between(self, low, high, first):
+        """Sequence numbers of live entries with low <= result <= high"""
+        seqs = set()
+        start = (float('-inf') if low is None else low, -1)
+        for result, seq in self.by_result.iter_from(start):
+            if high is not None and result > high:
+                break
+            if seq >= first:
+                seqs.add(seq)
+        return seqs
+
+    def stale(self, live):
+        """True once entries that left the buffer outnumber the live ones"""
+        return len(self.by_result) > 2 * live + 64
+
+
+class History:
+    """Bounded ring buffer of calculations
+
+    Results and timestamps live in float arrays and equations are interned,
+    so repeated equations share one string. Results a float cannot hold,
+    such as 50-digit decimals, are also kept as they are for display; the
+    store persists them as floats. Display text is only built when an
+    entry is rendered. Once capacity entries are stored, each new entry
+    replaces the oldest one. An attached HistoryStore receives every new
+    entry for persistence.
+    """
+
+    def __init__(self, capacity=10000, render=None):
+        self.capacity = capacity
+        self.render = render or (lambda equation, result: f"{equation} = {result}")
+        self.results = array('d')
+        self.times = array('d')
+        self.equations = []
+        # Slot -> result, for results the float array rounds
+        self.exact = {}
+        # Index of the oldest entry once the buffer is full
+        self.head = 0
+        # Entries appended so far; entry n has sequence number n
+        self.total = 0
+        # Search indexes, built on the first search
+        self.index = None
+        self.store = None
+
+    def attach(self, store, preload=None):
+        """Persist new entries to store and load its most recent entries
+
+        Only the last preload entries (default: capacity) are read, newest
+        first through the primary key, however large the store is. Entries
+        added before attaching are kept after the loaded ones and written to
+        the store, so a GUI can attach once its window is up.
+        """
+        early = list(self)
+        self.clear()
+        self.store = None
+        for created, equation, result in store.recent(self.capacity if preload is None else preload)[::-1]:
+            self.append(equation, result, created)
+        self.store = store
+        for entry in early:
+            self.append(entry.equation, entry.result, entry.created)
+
+    def append(self, equation, result, created=None):
+        if created is None:
+            created = time.time()
+        equation = sys.intern(equation)
+        if len(self.equations) < self.capacity:
+            slot = len(self.equations)
+            self.results.append(result)
+            self.times.append(created)
+            self.equations.append(equation)
+        elif self.capacity > 0:
+            slot = self.head
+            self.results[slot] = result
+            self.times[slot] = created
+            self.equations[slot] = equation
+            self.head = (slot + 1) % self.capacity
+        else:
+            return
+        if self.results[slot] != result:
+            self.exact[slot] = result
+        elif self.exact:
+            self.exact.pop(slot, None)
+        if self.index is not None:
+            self.index.add(self.total, equation, result)
+        self.total += 1
+        if self.store is not None:
+            self.store.add(created, equation, float(result))
+
+    def __len__(self):
+        return len(self.equations)
+
+    def __bool__(self):
+        return bool(self.equations)
+
+    def position(self, index):
+        """Map a logical index, oldest first, to its slot in the buffer"""
+        count = len(self.equations)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("history index out of range")
+        return (self.head + index) % count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        slot = self.position(index)
+        result = self.exact[slot] if slot in self.exact else self.results[slot]
+        return HistoryEntry(self.equations[slot], result, self.times[slot], self)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def recent(self, count):
+        """Display strings of the last count entries, oldest first"""
+        return [str(entry) for entry in self[-count:]] if count > 0 else []
+
+    def values(self):
+        """Results column, oldest first, for batch conversions"""
+        return self.results[self.head:] + self.results[:self.head]
+
+    def resize(self, capacity):
+        """Change the capacity, keeping the newest entries"""
+        keep = self[-capacity:] if capacity > 0 else []
+        self.clear()
+        self.capacity = capacity
+        store, self.store = self.store, None
+        for entry in keep:
+            self.append(entry.equation, entry.result, entry.created)
+        self.store = store
+
+    def full(self):
+        """Every entry including those only the store has, oldest first"""
+        return self if self.store is None else FullHistory(self)
+
+    def clear(self):
+        """Forget the entries held in memory; persisted entries are kept"""
+        self.results = array('d')
+        self.times = array('d')
+        self.equations = []
+        self.exact = {}
+        self.head = 0
+        self.total = 0
+        self.index = None
+
+    def ensure_index(self):
+        """Build the search indexes, or rebuild them once mostly stale"""
+        if self.index is None or self.index.stale(len(self)):
+            first = self.total - len(self)
+            slots = (self.position(offset) for offset in range(len(self)))
+            self.index = HistoryIndex((first + offset, self.equations[slot], self.results[slot])
+                                      for offset, slot in enumerate(slots))
+        return self.index
+
+    def time_offset(self, moment):
+        """Logical index of the first entry created at or after moment"""
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            if self.times[self.position(middle)] < moment:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def search(self, text=None, prefix=None, low=None, high=None, start=None, end=None, limit=100):
+        """Entries matching every given filter, newest first
+
+        text matches anywhere in the equation and prefix at its start, low
+        and high bound the result, start and end bound the creation time in
+        seconds since the epoch. Entries in memory are searched through the
+        indexes; when they give fewer than limit matches the search goes on
+        in the store, among the rows older than the oldest entry in memory.
+        """
+        entries, older = self.search_memory(text, prefix, low, high, start, end, limit)
+        if older is not None:
+            entries.extend(self.entries(self.store.search(*older)))
+        return entries
+
+    def search_later(self, text=None, prefix=None, low=None, high=None, start=None, end=None,
+                     limit=100):
+        """search() without waiting for the store
+
+        Returns the matches in memory, newest first, and a future for the
+        store's older rows to pass to entries(), or None when the store has
+        nothing to add. A text search reads every row of the store, so the
+        GUI runs it on the store's search thread.
+        """
+        entries, older = self.search_memory(text, prefix, low, high, start, end, limit)
+        return entries, None if older is None else self.store.search_later(*older)
+
+    def search_memory(self, text, prefix, low, high, start, end, limit):
+        """Matches in memory, and the store.search() arguments for the rest or None"""
+        index = self.ensure_index()
+        first = self.total - len(self)
+        # Time filters map to a contiguous range of sequence numbers
+        lowest = first if start is None else first + self.time_offset(start)
+        highest = self.total if end is None else first + self.time_offset(end + 1e-9)
+
+        matches = None
+        if prefix is not None:
+            matches = index.prefix(prefix, lowest)
+        if low is not None or high is not None:
+            found = index.results_between(low, high, lowest)
+            matches = found if matches is None else matches & found
+        if text:
+            if matches is not None and len(matches) < len(index.by_equation):
+                # Checking the few candidates beats scanning every equation
+                matches = {seq for seq in matches
+                           if text in self.equations[self.position(seq - first)]}
+            else:
+                found = index.containing(text, lowest)
+                matches = found if matches is None else matches & found
+        if matches is None:
+            seqs = range(highest - 1, lowest - 1, -1)
+        else:
+            seqs = sorted((seq for seq in matches if seq < highest), reverse=True)
+        entries = [self[seq - first] for seq in seqs[:limit]]
+
+        before = self.times[self.position(0)] if self else float('inf')
+        if self.store is not None and len(entries) < limit and (start is None or start < before):
+            return entries, (text, prefix, low, high, start, end, before, limit - len(entries))
+        return entries, None
+
+    def entries(self, rows):
+        """Entries for (created, equation, result) rows read from the store"""
+        return [HistoryEntry(equation, result, created, self) for created, equation, result in rows]
+
+    def query(self, text, limit=100):
+        """Entries for a popup query, newest first
+
+        "=N" finds results equal to N, "A..B" results from A to B, and any
+        other text, including a half-typed number such as "=." or "1...",
+        is looked up in the equations.
+        """
+        return self.search(limit=limit, **self.query_filters(text))
+
+    def query_later(self, text, limit=100):
+        """query() without waiting for the store, as search_later()"""
+        return self.search_later(limit=limit, **self.query_filters(text))
+
+    def query_filters(self, text):
+        """search() filters for a popup query"""
+        match = _RESULT_QUERY.match(text)
+        if match:
+            value = float(match.group(1))
+            return {'low': value, 'high': value}
+        match = _RANGE_QUERY.match(text)
+        if match:
+            return {'low': float(match.group(1)), 'high': float(match.group(2))}
+        return {'text': text.strip().replace('×', '*').replace('÷', '/').replace('−', '-')}
+
+    def commit(self):
+        """Commit entries waiting in the store's queue, if there is a store"""
+        if self.store is not None:
+            self.store.commit()
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+
+class HistoryStore:
+    """SQLite database of calculations written in batches by a background thread
+
+    The database runs in WAL mode so the GUI can read while the writer
+    commits. add() only queues the row; the writer thread collects rows for
+    flush_interval seconds and commits them in one transaction, keeping disk
+    work off the Tk main loop. With flush_interval None the writer waits for
+    commit() instead, so the caller decides when a batch ends. Queries use
+    the indexes on created and result.
+    """
+
+    def __init__(self, path, flush_interval=0.5):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.pending = queue.SimpleQueue()
+        connection = self.connect()
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "id INTEGER PRIMARY KEY, created REAL NOT NULL, "
+                "equation TEXT NOT NULL, result REAL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS history_created ON history (created)")
+            connection.execute("CREATE INDEX IF NOT EXISTS history_result ON history (result)")
+        # Connection for queries from the thread that created the store
+        self.reader = connection
+        # Thread and connection for search_later(), started on first use
+        self.searcher = None
+        self.search_connection = None
+        self.writer = threading.Thread(target=self.write_loop, name="history-writer", daemon=True)
+        self.writer.start()
+
+    def connect(self, **options):
+        # Imported here so programs that never open a store skip loading SQLite
+        import sqlite3
+        connection = sqlite3.connect(self.path, **options)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def add(self, created, equation, result):
+        self.pending.put((created, equation, result))
+
+    def write_loop(self):
+        connection = self.connect()
+        rows = []
+        running = True
+        while running:
+            item = self.pending.get()
+            if isinstance(item, tuple):
+                if self.flush_interval is None:
+                    # Rows wait for commit(), flush() or close()
+                    rows.append(item)
+                    continue
+                # Let a burst of calculations collect into one transaction
+                time.sleep(self.flush_interval)
+            items = [item]
+            while True:
+                try:
+                    items.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            rows.extend(row for row in items if isinstance(row, tuple))
+            if rows:
+                with connection:
+                    connection.executemany(
+                        "INSERT INTO history (created, equation, result) VALUES (?, ?, ?)", rows)
+                rows = []
+            for event in items:
+                if isinstance(event, threading.Event):
+                    event.set()
+            running = None not in items
+        connection.close()
+
+    def commit(self):
+        """Ask the writer to commit the rows added so far without waiting"""
+        self.pending.put(_COMMIT)
+
+    def flush(self):
+        """Block until every row added so far is committed"""
+        done = threading.Event()
+        self.pending.put(done)
+        done.wait()
+
+    def rows(self, sql, parameters, connection=None):
+        connection = connection or self.reader
+        return [(created, equation, float('nan') if result is None else result)
+                for created, equation, result in connection.execute(sql, parameters)]
+
+    def recent(self, limit):
+        """Newest rows first as (created, equation, result)"""
+        return self.rows(
+            "SELECT created, equation, result FROM history ORDER BY id DESC LIMIT ?", (limit,))
+
+    def search(self, text=None, prefix=None, low=None, high=None, start=None, end=None,
+               before=None, limit=100, connection=None):
+        """Newest rows first matching every given filter, as History.search
+
+        Rows created at or after before are left out. Time and result
+        bounds are answered through the indexes on created and result.
+        """
+        clauses = []
+        parameters = []
+        if text:
+            clauses.append("instr(equation, ?) > 0")
+            parameters.append(text)
+        if prefix is not None:
+            clauses.append("substr(equation, 1, ?) = ?")
+            parameters += [len(prefix), prefix]
+        for clause, value in (("result >= ?", low), ("result <= ?", high), ("created >= ?", start),
+                              ("created <= ?", end), ("created < ?", before)):
+            if value is not None:
+                clauses.append(clause)
+                parameters.append(value)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return self.rows(
+            "SELECT created, equation, result FROM history" + where +
+            " ORDER BY created DESC, id DESC LIMIT ?", (*parameters, limit), connection)
+
+    def search_later(self, *args):
+        """Run search() on a background thread, returning a Future of its rows
+
+        The thread reads through its own connection, so a search scanning
+        the whole table keeps neither the caller nor the writer waiting.
+        """
+        if self.searcher is None:
+            from concurrent.futures import ThreadPoolExecutor
+            # Only ever used by the one search thread, and closed after it stops
+            self.search_connection = self.connect(check_same_thread=False)
+            self.searcher = ThreadPoolExecutor(1, thread_name_prefix="history-search")
+        return self.searcher.submit(self.search, *args, connection=self.search_connection)
+
+    def id_range(self, before):
+        """Ids first <= id < end of the rows added before the first one created at or after before"""
+        # Separate queries, so each is one step down the primary key
+        first = self.reader.execute("SELECT min(id) FROM history").fetchone()[0]
+        if first is None:
+            return 1, 1
+        last = self.reader.execute("SELECT max(id) FROM history").fetchone()[0]
+        # Through the created index: only the rows from before on are read
+        end = self.reader.execute(
+            "SELECT min(id) FROM history INDEXED BY history_created WHERE created >= ?",
+            (before,)).fetchone()[0]
+        return first, last + 1 if end is None else end
+
+    def page(self, start, end):
+        """Rows with ids from start up to end, oldest first, through the primary key"""
+        return self.rows(
+            "SELECT created, equation, result FROM history WHERE id >= ? AND id < ? ORDER BY id",
+            (start, end))
+
+    def count(self, before=None):
+        """Number of rows, or of rows created before before"""
+        if before is None:
+            return self.reader.execute("SELECT count(*) FROM history").fetchone()[0]
+        return self.reader.execute(
+            "SELECT count(*) FROM history WHERE created < ?", (before,)).fetchone()[0]
+
+    def close(self):
+        """Commit pending rows and stop the writer thread"""
+        if self.writer.is_alive():
+            self.pending.put(None)
+            self.writer.join()
+        if self.searcher is not None:
+            self.searcher.shutdown(cancel_futures=True)
+            self.search_connection.close()
+        self.reader.close()
@@ -0,0 +1,152 @@
+import json
+import os
+import time
+from collections import Counter
+
+# Action names for the values click() dispatches; anything else is a key
+CLICK_ACTIONS = {
+    '=': 'equals',
+    'bin': 'convert',
+    'fraction': 'convert',
+    'H': 'history',
+    'convert': 'mode',
+    'CLR': 'clear',
+    '⌫': 'backspace',
+}
+
+
+class LatencyHistogram:
+    """Latency counts in power-of-two microsecond buckets
+
+    Bucket i holds latencies below 2**i microseconds, so recording is a
+    bit_length() and an increment and the memory use is fixed.
+    """
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        bucket = min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        """Upper bound in milliseconds of the bucket holding the p-th latency"""
+        if not self.count:
+            return 0.0
+        rank = p * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return (1 << bucket) / 1000
+        return self.max * 1000
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': self.max * 1000,
+            'buckets_us': {f"<{1 << bucket}": count
+                           for bucket, count in enumerate(self.counts) if count},
+        }
+
+
+class Metrics:
+    """Per-action latencies, error counts and cache hit rates of a calculator
+
+    Nothing here runs until a caller wraps functions with timed() or
+    counted_errors(), so a calculator without metrics pays nothing.
+    """
+
+    def __init__(self, engine=None, path=None):
+        self.engine = engine
+        self.path = path
+        self.histograms = {}
+        self.errors = Counter()
+        self.started = time.time()
+        self.profiler = None
+
+    def record(self, action, seconds):
+        histogram = self.histograms.get(action)
+        if histogram is None:
+            histogram = self.histograms[action] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def timed(self, action, function):
+        """Wrap function so each call is recorded under action"""
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(action, time.perf_counter() - started)
+        return wrapper
+
+    def timed_click(self, click):
+        """Wrap a click(value) dispatcher, naming each action from its value"""
+        def wrapper(value):
+            started = time.perf_counter()
+            try:
+                return click(value)
+            finally:
+                self.record(CLICK_ACTIONS.get(value, 'key'), time.perf_counter() - started)
+        return wrapper
+
+    def counted_errors(self, error_message):
+        """Wrap engine.error_message so every reported error is counted by type"""
+        def wrapper(error):
+            message = error_message(error)
+            self.errors[f"{type(error).__name__}: {message}"] += 1
+            return message
+        return wrapper
+
+    def start_profile(self):
+        """Profile everything until stop_profile(), with cProfile"""
+        import cProfile
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop_profile(self, path):
+        """Stop profiling and write the stats to path for pstats or snakeviz"""
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(path)
+            self.profiler = None
+
+    def snapshot(self):
+        snapshot = {
+            'uptime_s': time.time() - self.started,
+            'actions': {action: histogram.snapshot()
+                        for action, histogram in sorted(self.histograms.items())},
+            'errors': dict(self.errors.most_common()),
+        }
+        for name, attribute in (('expression_cache', 'cache'), ('conversion_cache', 'conversions')):
+            cache = getattr(self.engine, attribute, None)
+            if cache is not None:
+                snapshot[name] = {
+                    'hits': cache.hits,
+                    'misses': cache.misses,
+                    'hit_rate': cache.hit_rate(),
+                }
+        return snapshot
+
+    def export(self, path=None):
+        """Write the snapshot as JSON, replacing the file in one step"""
+        path = path or self.path
+        if path is None:
+            return
+        temporary = path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(temporary, path)
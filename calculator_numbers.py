@@ -0,0 +1,136 @@
+from decimal import Context, Decimal
+from math import isfinite
+from fractions import Fraction
+from numbers import Number
+
+
+def _check_number(value):
+    """Refuse bindings such as strings that would otherwise be parsed"""
+    if not isinstance(value, Number):
+        raise TypeError(f"{value!r} is not a number")
+
+
+def _float_bind(value):
+    """A number bound to a template variable, as an int or float"""
+    if value.__class__ is int or value.__class__ is float:
+        return value
+    _check_number(value)
+    return float(value)
+
+
+class FloatNumbers:
+    """Keypad literals with a decimal point as floats and true division
+
+    This is how Python evaluates the equation, and the default. A divide of
+    None tells the evaluator to use the / operator directly, and a context
+    of None that no decimal context has to be entered. bind converts a
+    value given for a template variable, such as ANS, into this system.
+    """
+
+    name = 'float'
+    decimal = float
+    divide = None
+    context = None
+    bind = staticmethod(_float_bind)
+
+
+def _exact_decimal(token):
+    """Exact value of a keypad literal such as 12.5, 12. or .5"""
+    whole, _, digits = token.partition('.')
+    scale = 10 ** len(digits)
+    value = Fraction(int(whole or '0') * scale + int(digits or '0'), scale)
+    return value.numerator if value.denominator == 1 else value
+
+
+def _exact_divide(a, b):
+    """a / b as an int when it divides evenly, otherwise as a Fraction"""
+    if a.__class__ is int and b.__class__ is int:
+        quotient, remainder = divmod(a, b)
+        if not remainder:
+            return quotient
+        return Fraction(a, b)
+    value = Fraction(a) / b
+    return value.numerator if value.denominator == 1 else value
+
+
+def _exact_bind(value):
+    """A bound number as an int or Fraction; a float by its repr, so 0.1 is 1/10"""
+    if value.__class__ is int:
+        return value
+    _check_number(value)
+    if value.__class__ is float and isfinite(value):
+        value = Fraction(repr(value))
+    else:
+        value = Fraction(value)
+    return value.numerator if value.denominator == 1 else value
+
+
+class ExactNumbers:
+    """Rational arithmetic: literals become Fractions and division is exact
+
+    Integers stay ints, so equations without division or decimal points
+    run at integer speed; only a division that leaves a remainder or a
+    decimal literal brings in a Fraction. Results can be shown as fractions
+    without reconstructing them from a float.
+    """
+
+    name = 'exact'
+    decimal = staticmethod(_exact_decimal)
+    divide = staticmethod(_exact_divide)
+    context = None
+    bind = staticmethod(_exact_bind)
+
+
+class DecimalNumbers:
+    """Decimal arithmetic rounded to a fixed number of significant digits
+
+    Integer arithmetic is exact, so ints stay ints and an equation without
+    decimal points or uneven divisions never leaves the fast int path. Only
+    decimal literals and divisions that leave a remainder become Decimals,
+    and the evaluator runs in this context so every Decimal operation
+    rounds to precision digits.
+    """
+
+    decimal = staticmethod(Decimal)
+
+    def __init__(self, precision):
+        self.name = f'decimal{precision}'
+        self.precision = precision
+        self.context = Context(prec=precision)
+
+    def divide(self, a, b):
+        if not b:
+            # The context would raise DivisionUndefined for 0/0, which is
+            # not a ZeroDivisionError; report every zero divisor the same way
+            raise ZeroDivisionError("DIVISION BY ZERO")
+        if a.__class__ is int and b.__class__ is int:
+            quotient, remainder = divmod(a, b)
+            if not remainder:
+                return quotient
+        return self.context.divide(a, b)
+
+    def bind(self, value):
+        """A bound number as an int or Decimal; a float by its repr, so 0.1 is 0.1"""
+        if value.__class__ is int or value.__class__ is Decimal:
+            return value
+        _check_number(value)
+        if value.__class__ is Fraction:
+            return self.context.divide(Decimal(value.numerator), value.denominator)
+        return Decimal(repr(value) if value.__class__ is float else value)
+
+
+def format_decimal(number):
+    """Every significant digit of a Decimal, without exponent or trailing zeros"""
+    text = f"{number:f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    return '0' if text == '-0' else text
+
+
+FLOAT = FloatNumbers()
+EXACT = ExactNumbers()
+# Precision tiers: the decimal module default, and two for longer work
+DECIMAL_TIERS = tuple(DecimalNumbers(precision) for precision in (28, 50, 100))
+
+# Number systems by the name used on the command line
+NUMBERS = {numbers.name: numbers for numbers in (FLOAT, EXACT) + DECIMAL_TIERS}
@@ -0,0 +1,535 @@
+import re
+from decimal import localcontext
+
+from calculator_numbers import FLOAT
+
+OPERATORS = '+-*/'
+
+# Operators split the equation into operands in one C-level scan
+_SPLIT = re.compile(r'([-+*/])')
+# The same split for equations with parentheses
+_NESTED_SPLIT = re.compile(r'([-+*/()])')
+# Keypad number literals: 12, 12., 12.5 and .5
+_NUMBER = re.compile(r'[0-9]+(?:\.[0-9]*)?|\.[0-9]+')
+NUMBER_CHARS = '0123456789.'
+
+
+class ParsedExpression:
+    """Validated equation stored as alternating operands and operators"""
+
+    __slots__ = ('operands', 'operators', 'divide', 'context')
+
+    def __init__(self, operands, operators, divide=None, context=None):
+        self.operands = operands
+        self.operators = operators
+        # Division and decimal context of the number system the operands
+        # were read in
+        self.divide = divide
+        self.context = context
+
+    def evaluate(self, bindings=None):
+        """Evaluate the expression, looking up named operands in bindings"""
+        operands = self.operands
+        if bindings is not None:
+            operands = [bindings[value] if value.__class__ is str else value for value in operands]
+        if self.context is None:
+            return fold(operands, self.operators, self.divide)
+        with localcontext(self.context):
+            return fold(operands, self.operators, self.divide)
+
+    def apply(self, operands, divide=None):
+        """Fold other operands, such as arrays, in the shape of this expression"""
+        return fold(operands, self.operators, divide)
+
+    def structure(self):
+        """Expressions with equal structures differ only in their operands"""
+        return tuple(self.operators)
+
+
+class NestedExpression:
+    """Validated equation with parentheses, stored as a postfix program
+
+    The program lists operators in evaluation order, with OPERAND wherever
+    the next operand is pushed. Operands keep their order in the equation,
+    so they are stored once, as in ParsedExpression.
+    """
+
+    __slots__ = ('operands', 'program', 'divide', 'context')
+
+    def __init__(self, operands, program, divide=None, context=None):
+        self.operands = operands
+        self.program = program
+        self.divide = divide
+        self.context = context
+
+    def evaluate(self, bindings=None):
+        """Evaluate the expression, looking up named operands in bindings"""
+        operands = self.operands
+        if bindings is not None:
+            operands = [bindings[value] if value.__class__ is str else value for value in operands]
+        if self.context is None:
+            return run(self.program, operands, self.divide)
+        with localcontext(self.context):
+            return run(self.program, operands, self.divide)
+
+    def apply(self, operands, divide=None):
+        """Evaluate other operands, such as arrays, in the shape of this expression"""
+        return run(self.program, operands, divide)
+
+    def structure(self):
+        """Expressions with equal structures differ only in their operands"""
+        return tuple(self.program)
+
+
+def fold(operands, operators, divide=None):
+    """Combine operands with * and / binding tighter than + and -, left to right
+
+    Works on anything supporting the arithmetic operators, so the same
+    precedence rules apply to Python numbers and to NumPy arrays. divide
+    replaces the / operator, as exact arithmetic needs.
+    """
+    total = None
+    add_op = '+'
+    term = operands[0]
+    for op, value in zip(operators, operands[1:]):
+        if op == '*':
+            term = term * value
+        elif op == '/':
+            term = term / value if divide is None else divide(term, value)
+        else:
+            # Fold the finished term into the running sum
+            if total is None:
+                total = term
+            elif add_op == '+':
+                total = total + term
+            else:
+                total = total - term
+            add_op = op
+            term = value
+    if total is None:
+        return term
+    if add_op == '+':
+        return total + term
+    return total - term
+
+
+# Postfix program step that pushes the next operand
+OPERAND = None
+# Binding strength of each operator; all of them associate to the left
+PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+
+
+def run(program, operands, divide=None):
+    """Evaluate a postfix program on an explicit stack
+
+    Takes time linear in the program and no Python recursion, however
+    deeply the parentheses nest. divide replaces the / operator, as in fold().
+    """
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    values = iter(operands)
+    for step in program:
+        if step is OPERAND:
+            push(next(values))
+            continue
+        value = pop()
+        if step == '+':
+            stack[-1] = stack[-1] + value
+        elif step == '-':
+            stack[-1] = stack[-1] - value
+        elif step == '*':
+            stack[-1] = stack[-1] * value
+        elif divide is None:
+            stack[-1] = stack[-1] / value
+        else:
+            stack[-1] = divide(stack[-1], value)
+    return stack[0]
+
+
+def literal(token, numbers=FLOAT):
+    """Convert a keypad number to int or float, or None if it is not valid
+
+    Numbers with a decimal point are read by the number system, so exact
+    arithmetic gets a Fraction instead of a float.
+    """
+    if not _NUMBER.fullmatch(token):
+        return None
+    if '.' in token:
+        return numbers.decimal(token)
+    if token[0] == '0' and token.strip('0'):
+        # Leading zeros are not valid integer literals
+        return None
+    try:
+        return int(token)
+    except ValueError:
+        # Integer literal longer than the interpreter allows
+        return None
+
+
+def parse(equation, names=(), numbers=FLOAT):
+    """Tokenize and validate an equation in a single pass
+
+    Raises the same errors, in the same order of precedence, as the old
+    string checks followed by eval(): INCOMPLETE EQUATION, DIVISION BY ZERO,
+    INVALID OPERATOR SEQUENCE and then SYNTAX ERROR. Operands listed in names
+    are kept as strings so they can be bound when the expression is evaluated.
+    Literals and division follow the number system, see calculator_numbers.
+    """
+    equation = equation.rstrip()
+    if not equation:
+        raise SyntaxError("SYNTAX ERROR")
+
+    # Check for invalid operators at the end
+    if equation[-1] in OPERATORS or equation[-1] == '.':
+        raise ValueError("INCOMPLETE EQUATION")
+
+    if '(' in equation or ')' in equation:
+        return parse_nested(equation, names, numbers)
+
+    tokens = _SPLIT.split(equation)
+    operands = []
+    bad_sequence = False
+    bad_syntax = False
+    # A divisor segment runs from a '/' to the next '/' and is a division
+    # by zero when it starts with 0 and holds no decimal point
+    divisor_zero = False
+    divisor_dot = False
+
+    for index in range(0, len(tokens), 2):
+        if index:
+            if tokens[index - 1] == '/':
+                if divisor_zero and not divisor_dot:
+                    raise ZeroDivisionError("DIVISION BY ZERO")
+                divisor_zero = tokens[index].lstrip()[:1] == '0'
+                divisor_dot = False
+
+        token = tokens[index].strip()
+        if '.' in token:
+            divisor_dot = True
+        if not token:
+            # Leading operator or two operators in a row
+            bad_sequence = True
+            continue
+        if bad_syntax or bad_sequence:
+            continue
+        if token in names:
+            operands.append(token)
+            continue
+        value = literal(token, numbers)
+        if value is None:
+            bad_syntax = True
+        else:
+            operands.append(value)
+
+    if divisor_zero and not divisor_dot:
+        raise ZeroDivisionError("DIVISION BY ZERO")
+    if bad_sequence:
+        raise ValueError("INVALID OPERATOR SEQUENCE")
+    if bad_syntax:
+        raise SyntaxError("SYNTAX ERROR")
+    return ParsedExpression(operands, tokens[1::2], numbers.divide, numbers.context)
+
+
+def parse_nested(equation, names=(), numbers=FLOAT):
+    """Tokenize and validate an equation with parentheses in a single pass
+
+    Builds the postfix program with an explicit operator stack, so nesting
+    depth costs memory rather than Python stack. A division by a literal
+    zero is reported first, then a leading operator or two in a row (also
+    right after '('), then anything else malformed: unbalanced parentheses,
+    '()' or a number next to a parenthesis. Call parse(), which checks for
+    an incomplete equation first.
+    """
+    tokens = _NESTED_SPLIT.split(equation)
+    operands = []
+    program = []
+    append = program.append
+    pending = []
+    bad_sequence = False
+    bad_syntax = False
+    # Waiting for an operand, as at the start or after an operator or '('
+    expect_operand = True
+    last = None
+
+    for index, token in enumerate(tokens):
+        if index % 2:
+            if token == '(':
+                if not expect_operand:
+                    # A number or ')' right before '('
+                    bad_syntax = True
+                pending.append(token)
+            elif token == ')':
+                if expect_operand:
+                    # '()' or an operator right before ')'
+                    bad_syntax = True
+                while pending and pending[-1] != '(':
+                    append(pending.pop())
+                if pending:
+                    pending.pop()
+                else:
+                    bad_syntax = True
+                expect_operand = False
+            else:
+                if expect_operand:
+                    bad_sequence = True
+                precedence = PRECEDENCE[token]
+                while pending and pending[-1] != '(' and PRECEDENCE[pending[-1]] >= precedence:
+                    append(pending.pop())
+                pending.append(token)
+                expect_operand = True
+            last = token
+            continue
+
+        token = token.strip()
+        if not token:
+            continue
+        if not expect_operand:
+            # A number right after ')'
+            bad_syntax = True
+        expect_operand = False
+        if token in names:
+            operands.append(token)
+            append(OPERAND)
+            continue
+        value = literal(token, numbers)
+        if value is None:
+            bad_syntax = True
+            continue
+        if last == '/' and value == 0 and '.' not in token:
+            raise ZeroDivisionError("DIVISION BY ZERO")
+        operands.append(value)
+        append(OPERAND)
+
+    if '(' in pending:
+        bad_syntax = True
+    if bad_sequence:
+        raise ValueError("INVALID OPERATOR SEQUENCE")
+    if bad_syntax:
+        raise SyntaxError("SYNTAX ERROR")
+    while pending:
+        append(pending.pop())
+    return NestedExpression(operands, program, numbers.divide, numbers.context)
+
+
+def number_has_point(equation):
+    """Whether the number at the end of equation already has a decimal point
+
+    equation is a string or a list of its characters. Only the characters
+    back to the last operator or parenthesis are read, so the cost does not
+    grow with the equation.
+    """
+    for char in reversed(equation):
+        if char == '.':
+            return True
+        if char not in NUMBER_CHARS:
+            return False
+    return False
+
+
+def keypad_keys(text, equation=''):
+    """The keys text types after equation, as one string
+
+    equation is a string or a list of its characters. Digits, operators and parentheses are kept, a second decimal point
+    within one number is skipped and anything else is dropped.
+    """
+    has_point = number_has_point(equation)
+    keys = []
+    for char in text:
+        if char in '0123456789':
+            keys.append(char)
+        elif char in '+-*/()':
+            has_point = False
+            keys.append(char)
+        elif char == '.' and not has_point:
+            has_point = True
+            keys.append(char)
+    return ''.join(keys)
+
+class IncrementalExpression:
+    """Equation typed one key at a time with its evaluation kept up to date
+
+    Typing an operator completes the operand before it and folds it into a
+    running sum and term, so '=' only has to convert the last operand.
+    Backspacing over an operator restores the state saved when it was typed.
+    Equations with characters other than digits, '.' and operators fall back
+    to a full parse on '='. The typed characters are kept in a list, so a
+    key costs the same however long the equation is; the equation string
+    is joined only when it is read after a change, and a display follows
+    the typing through changes() instead.
+    """
+
+    # Fold state: (total, add_op, term, last_op, divisor_zero, divisor_dot,
+    # division_by_zero, bad_sequence, bad_syntax, runtime_error)
+    START = (None, '+', None, None, False, False, False, False, False, None)
+
+    def __init__(self, equation='', numbers=FLOAT):
+        self.numbers = numbers
+        self.reset(equation)
+
+    def reset(self, equation=''):
+        self.chars = []
+        # Joined equation, or None after a change
+        self.joined = ''
+        # Leading characters left as they were since the last changes()
+        self.unchanged = 0
+        self.start = 0
+        self.state = self.START
+        self.saved = []
+        self.unusual = 0
+        self.extend(equation)
+
+    @property
+    def equation(self):
+        if self.joined is None:
+            self.joined = ''.join(self.chars)
+        return self.joined
+
+    def __len__(self):
+        return len(self.chars)
+
+    def changes(self):
+        """What changed since the last call, as (keep, tail)
+
+        The equation is now its first keep characters, as they were at the
+        last call, followed by tail. Only tail is joined, so a display that
+        calls this once per redraw never reads the whole equation.
+        """
+        keep = self.unchanged
+        self.unchanged = len(self.chars)
+        return keep, ''.join(self.chars[keep:])
+
+    def extend(self, text):
+        """Append text in one pass, with the same effect as pushing each character"""
+        chars = self.chars
+        base = len(chars)
+        last = 0
+        for i, char in enumerate(text):
+            if char in OPERATORS:
+                if self.start >= base:
+                    operand = text[last:i]
+                else:
+                    # The first operand began before this text
+                    operand = ''.join(chars[self.start:]) + text[:i]
+                # Save only once the operand is folded, so an error leaves no stray undo state
+                state = self.complete(self.state, operand)
+                self.saved.append((self.state, self.start))
+                self.state = state[:3] + (char,) + state[4:]
+                self.start = base + i + 1
+                last = i + 1
+            elif char not in NUMBER_CHARS:
+                self.unusual += 1
+        if text:
+            chars.extend(text)
+            self.joined = None
+
+    def push(self, char):
+        chars = self.chars
+        if char in OPERATORS:
+            state = self.complete(self.state, ''.join(chars[self.start:]))
+            self.saved.append((self.state, self.start))
+            self.state = state[:3] + (char,) + state[4:]
+            chars.append(char)
+            self.start = len(chars)
+        else:
+            if char not in NUMBER_CHARS:
+                self.unusual += 1
+            chars.append(char)
+        self.joined = None
+
+    def pop(self):
+        """Remove the last character, undoing its effect on the state"""
+        if not self.chars:
+            return
+        char = self.chars.pop()
+        self.joined = None
+        self.unchanged = min(self.unchanged, len(self.chars))
+        if char in OPERATORS:
+            self.state, self.start = self.saved.pop()
+        elif char not in NUMBER_CHARS:
+            self.unusual -= 1
+
+    def complete(self, state, operand):
+        """Fold a finished operand into the state, mirroring parse() and fold()"""
+        context = self.numbers.context
+        if context is None:
+            return self._complete(state, operand)
+        with localcontext(context):
+            return self._complete(state, operand)
+
+    def _complete(self, state, operand):
+        (total, add_op, term, last_op, divisor_zero, divisor_dot,
+         division_by_zero, bad_sequence, bad_syntax, error) = state
+        dot = '.' in operand
+        if last_op == '/':
+            # This operand opens a new divisor segment
+            if divisor_zero and not divisor_dot:
+                division_by_zero = True
+            divisor_zero = operand[:1] == '0'
+            divisor_dot = dot
+        else:
+            divisor_dot = divisor_dot or dot
+
+        if not operand:
+            bad_sequence = True
+        elif not (bad_sequence or bad_syntax):
+            value = literal(operand, self.numbers)
+            if value is None:
+                bad_syntax = True
+            elif error is None:
+                try:
+                    if last_op is None:
+                        term = value
+                    elif last_op == '*':
+                        term = term * value
+                    elif last_op == '/':
+                        divide = self.numbers.divide
+                        term = term / value if divide is None else divide(term, value)
+                    else:
+                        if total is None:
+                            total = term
+                        elif add_op == '+':
+                            total = total + term
+                        else:
+                            total = total - term
+                        add_op = last_op
+                        term = value
+                except (ZeroDivisionError, OverflowError) as e:
+                    error = e
+        return (total, add_op, term, last_op, divisor_zero, divisor_dot,
+                division_by_zero, bad_sequence, bad_syntax, error)
+
+    def result(self):
+        """Return the value of the equation, raising the errors parse() would"""
+        chars = self.chars
+        if self.unusual or not chars:
+            return parse(self.equation, numbers=self.numbers).evaluate()
+        if chars[-1] in OPERATORS or chars[-1] == '.':
+            raise ValueError("INCOMPLETE EQUATION")
+        (total, add_op, term, last_op, divisor_zero, divisor_dot,
+         division_by_zero, bad_sequence, bad_syntax, error) = self.complete(
+            self.state, ''.join(chars[self.start:]))
+        if division_by_zero or (divisor_zero and not divisor_dot):
+            raise ZeroDivisionError("DIVISION BY ZERO")
+        if bad_sequence:
+            raise ValueError("INVALID OPERATOR SEQUENCE")
+        if bad_syntax:
+            raise SyntaxError("SYNTAX ERROR")
+        if error is not None:
+            raise type(error)(*error.args)
+        if total is None:
+            return term
+        context = self.numbers.context
+        if context is not None:
+            with localcontext(context):
+                return total + term if add_op == '+' else total - term
+        if add_op == '+':
+            return total + term
+        return total - term
+
+    def preview(self):
+        """Value the equation would have on '=', or None if it has none yet"""
+        try:
+            return self.result()
+        except Exception:
+            return None
@@ -0,0 +1,137 @@
+from decimal import localcontext
+from itertools import product
+
+from calculator_numbers import FLOAT
+from calculator_parser import OPERAND, PRECEDENCE, NestedExpression, ParsedExpression, parse, run
+
+# Names a template may use; ANS stands for the last result
+VARIABLES = ('x', 'y', 'ANS')
+
+
+class Plan(NestedExpression):
+    """A template such as x*1.08+ANS, compiled once and run for many bindings
+
+    Compiling parses and validates the template, turns it into a postfix
+    program and folds every subexpression made only of numbers, so 2*3+x
+    runs as 6+x. Only subexpressions that would be evaluated on their own
+    are folded; x+2+3 stays as written because (x+2)+3 may round
+    differently from x+5.
+    """
+
+    __slots__ = ('template', 'names', 'bind')
+
+    def __init__(self, template, names, operands, program, divide=None, context=None, bind=None):
+        super().__init__(operands, program, divide, context)
+        self.template = template
+        # Variables the template uses, in order of first appearance
+        self.names = names
+        # Converts bound values into the number system, such as a float ANS to a Decimal
+        self.bind = bind
+
+    def __call__(self, **bindings):
+        return self.evaluate(bindings)
+
+    def evaluate(self, bindings=None):
+        """Evaluate the template, converting bound values with bind first"""
+        if bindings is not None and self.bind is not None:
+            bind = self.bind
+            bindings = {name: bind(value) for name, value in bindings.items()}
+        return super().evaluate(bindings)
+
+    def sweep(self, **ranges):
+        """Yield (values, result or error) for every combination of ranges
+
+        ranges maps each variable to an iterable of values, such as a
+        range; the last one varies fastest. Errors are yielded in place
+        of the result so one bad row does not end the table.
+        """
+        names = tuple(ranges)
+        # product() reads every range up front, so bind each value once
+        # rather than once for every row it appears in
+        axes = [[(value, self.bound(value)) for value in values] for values in ranges.values()]
+        for row in product(*axes):
+            values = tuple(value for value, _ in row)
+            bound = [value for _, value in row]
+            for value in bound:
+                if isinstance(value, Exception):
+                    yield values, value
+                    break
+            else:
+                try:
+                    yield values, super().evaluate(dict(zip(names, bound)))
+                except (ArithmeticError, KeyError, TypeError) as e:
+                    yield values, e
+
+    def bound(self, value):
+        """value converted by bind, or the error converting it raised"""
+        if self.bind is None:
+            return value
+        try:
+            return self.bind(value)
+        except (ArithmeticError, TypeError, ValueError) as e:
+            return e
+
+    def __repr__(self):
+        return f"Plan({self.template!r})"
+
+
+def postfix(operators):
+    """Postfix program of a flat operator sequence, as fold() would evaluate it"""
+    program = [OPERAND]
+    append = program.append
+    pending = []
+    for op in operators:
+        precedence = PRECEDENCE[op]
+        while pending and PRECEDENCE[pending[-1]] >= precedence:
+            append(pending.pop())
+        pending.append(op)
+        append(OPERAND)
+    while pending:
+        append(pending.pop())
+    return program
+
+
+def fold_constants(operands, program, divide=None):
+    """Evaluate every step of program whose inputs are all numbers
+
+    Returns the remaining operands and program. A folded value is pushed by
+    a single step, so when both inputs of an operator are constants they
+    are the last two steps written and can be replaced in place. Errors
+    such as a division by zero raise here, since no binding can avoid them.
+    """
+    values = iter(operands)
+    folded = []
+    steps = []
+    # For each value on the evaluation stack, whether it is a constant
+    constant = []
+    for step in program:
+        if step is OPERAND:
+            value = next(values)
+            folded.append(value)
+            steps.append(OPERAND)
+            constant.append(value.__class__ is not str)
+        elif constant.pop() and constant[-1]:
+            right = folded.pop()
+            left = folded.pop()
+            folded.append(run((OPERAND, OPERAND, step), (left, right), divide))
+            steps.pop()
+        else:
+            steps.append(step)
+            constant[-1] = False
+    return folded, steps
+
+
+def compile_plan(template, names=VARIABLES, numbers=FLOAT):
+    """Compile a template into a Plan, raising the errors parse() raises"""
+    expression = parse(template, tuple(names), numbers)
+    if isinstance(expression, ParsedExpression):
+        program = postfix(expression.operators)
+    else:
+        program = expression.program
+    if numbers.context is None:
+        operands, program = fold_constants(expression.operands, program, numbers.divide)
+    else:
+        with localcontext(numbers.context):
+            operands, program = fold_constants(expression.operands, program, numbers.divide)
+    used = tuple(dict.fromkeys(value for value in operands if value.__class__ is str))
+    return Plan(template, used, operands, program, numbers.divide, numbers.context, numbers.bind)
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+from calculator_engine import CalculatorEngine
+
+
+class LatencyMetrics:
+    """Request counters and a window of recent per-request latencies"""
+
+    def __init__(self, window=10000):
+        self.requests = 0
+        self.errors = 0
+        self.batches = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, latency, failed):
+        self.requests += 1
+        self.errors += failed
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.recent.append(latency)
+
+    def snapshot(self):
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'batches': self.batches,
+            'mean_ms': self.total_latency / self.requests * 1000 if self.requests else 0.0,
+            'p50_ms': percentile(0.50),
+            'p99_ms': percentile(0.99),
+            'max_ms': self.max_latency * 1000,
+        }
+
+
+class CalculatorServer:
+    """Local asyncio TCP service evaluating JSON-lines expression requests
+
+    Each request line is a JSON object such as
+    {"id": 1, "expression": "7/2", "convert": ["bin", "fraction"]} and is
+    answered with one JSON line carrying the formatted result or the error
+    text, plus any requested conversions. Requests that queue up while a
+    batch is evaluated form the next batch, so a busy server handles many
+    per wakeup without ever waiting to collect them. A full queue stops
+    reading from clients, which pushes back over TCP. Lines longer than
+    max_line bytes are skipped and answered INVALID REQUEST.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, max_batch=256, max_queue=4096, engine=None,
+                 max_line=1 << 20):
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.max_line = max_line
+        self.engine = engine or CalculatorEngine()
+        self.metrics = LatencyMetrics()
+        self.queue = None
+        self.server = None
+        self.batcher = None
+        self.clients = set()
+
+    async def start(self):
+        self.queue = asyncio.Queue(self.max_queue)
+        self.batcher = asyncio.create_task(self.run_batches())
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                                 limit=self.max_line)
+        # Report the real port when started with port 0
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        tasks = [self.batcher, *self.clients]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        """Read pipelined requests and queue them; replies keep request order"""
+        loop = asyncio.get_running_loop()
+        self.clients.add(asyncio.current_task())
+        replies = asyncio.Queue(self.max_batch)
+        sender = asyncio.create_task(self.send_replies(replies, writer))
+        cancelled = False
+        try:
+            while True:
+                future = loop.create_future()
+                try:
+                    line = await read_line(reader)
+                    if not line:
+                        break
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError
+                except ValueError:
+                    # Oversized lines, bad JSON and non-objects alike
+                    future.set_result({'error': "INVALID REQUEST"})
+                    await replies.put(future)
+                    continue
+                if request.get('stats'):
+                    stats = self.metrics.snapshot()
+                    stats['cache_hit_rate'] = self.engine.cache.hit_rate()
+                    future.set_result(stats)
+                    await replies.put(future)
+                    continue
+                # Both puts wait when full, which stops reading from the client
+                await replies.put(future)
+                await self.queue.put((request, future, time.perf_counter()))
+        except ConnectionError:
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown; returning quietly keeps asyncio from logging it
+            cancelled = True
+        finally:
+            self.clients.discard(asyncio.current_task())
+            if cancelled or sender.done():
+                sender.cancel()
+            else:
+                # Let the sender write the replies still owed, then close
+                await replies.put(None)
+                await sender
+
+    async def send_replies(self, replies, writer):
+        try:
+            while True:
+                future = await replies.get()
+                if future is None:
+                    break
+                writer.write(json.dumps(await future, ensure_ascii=False).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run_batches(self):
+        """Evaluate whatever has queued as one batch, waiting only when the queue is empty"""
+        queue = self.queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            self.evaluate_batch(batch)
+
+    def evaluate_batch(self, batch):
+        self.metrics.batches += 1
+        for request, future, started in batch:
+            try:
+                response = self.evaluate_request(request)
+            except Exception:
+                # One bad request must not end the batcher serving everyone
+                response = {'id': request['id']} if 'id' in request else {}
+                response['error'] = "INVALID REQUEST"
+            latency = time.perf_counter() - started
+            self.metrics.record(latency, 'error' in response)
+            response['latency_ms'] = latency * 1000
+            if not future.done():
+                future.set_result(response)
+
+    def evaluate_request(self, request):
+        """Evaluate one request the way '=' and the convert buttons would"""
+        engine = self.engine
+        response = {}
+        if 'id' in request:
+            response['id'] = request['id']
+        expression = request.get('expression')
+        convert = request.get('convert') or []
+        if (not isinstance(expression, str) or not expression.strip()
+                or not isinstance(convert, list)
+                or not all(isinstance(name, str) for name in convert)):
+            response['error'] = "INVALID REQUEST"
+            return response
+        try:
+            response['result'] = engine.evaluate(expression, record=False)
+        except Exception as e:
+            response['error'] = engine.error_message(e)
+            return response
+        if 'bin' in convert:
+            response['binary'] = engine.to_binary(engine.last_result)
+        if 'fraction' in convert:
+            response['fraction'] = engine.to_fraction(engine.last_result)
+        return response
+
+
+async def read_line(reader):
+    """Next line from reader, b'' at the end of the stream
+
+    A line longer than the reader's limit is read to its end and discarded,
+    and ValueError is raised, so the next call starts at the next line.
+    """
+    oversized = False
+    while True:
+        try:
+            line = await reader.readuntil(b'\n')
+        except asyncio.IncompleteReadError as e:
+            # The stream ended, maybe after a last line without a newline
+            line = e.partial
+        except asyncio.LimitOverrunError as e:
+            # Drop what is buffered of the line, up to any newline in it
+            await reader.readexactly(e.consumed)
+            oversized = True
+            continue
+        if oversized:
+            raise ValueError("line too long")
+        return line
+
+
+async def request(payloads, host='127.0.0.1', port=8765):
+    """Send request objects over one connection and return the responses"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for payload in payloads:
+            writer.write(json.dumps(payload).encode() + b'\n')
+        await writer.drain()
+        return [json.loads(await reader.readline()) for _ in payloads]
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve calculator evaluations on localhost")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--max-batch', type=int, default=256)
+    parser.add_argument('--max-queue', type=int, default=4096,
+                        help="queued requests before clients are made to wait")
+    parser.add_argument('--max-line', type=int, default=1 << 20,
+                        help="longest request line in bytes; longer ones are answered INVALID REQUEST")
+    args = parser.parse_args(argv)
+    server = CalculatorServer(args.host, args.port, args.max_batch, args.max_queue,
+                              max_line=args.max_line)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
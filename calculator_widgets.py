@@ -0,0 +1,439 @@
+import argparse
+import sys
+import time
+import tkinter as tk
+
+from calculator_engine import CalculatorEngine
+from calculator_history import DEFAULT_PATH, HistoryStore
+from calculator_numbers import NUMBERS
+from calculator_parser import IncrementalExpression, number_has_point
+
+# Convert mode falls back to the normal keypad after this long
+CONVERT_TIMEOUT_MS = 5000
+# Quiet time after a calculation before history is committed to disk
+HISTORY_COMMIT_MS = 500
+# How often enabled metrics are written out
+METRICS_EXPORT_MS = 10000
+
+
+class Scheduler:
+    """Named deadlines run by the Tk main loop
+
+    Every job has a name. schedule() restarts a named deadline, so calling
+    it again before it fires pushes the deadline back, and idle() runs a job
+    once when Tk is next idle however often it is requested. Jobs run on the
+    main loop, so callbacks may touch widgets directly and no threads are
+    created.
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.jobs = {}
+
+    def schedule(self, name, delay_ms, callback, *args):
+        """Run callback after delay_ms, replacing any pending job of that name"""
+        self.cancel(name)
+        self.jobs[name] = self.widget.after(delay_ms, self.run, name, callback, args)
+
+    def idle(self, name, callback, *args):
+        """Run callback once when Tk is idle, unless that name is already pending"""
+        if name not in self.jobs:
+            self.jobs[name] = self.widget.after_idle(self.run, name, callback, args)
+
+    def cancel(self, name):
+        job = self.jobs.pop(name, None)
+        if job is not None:
+            self.widget.after_cancel(job)
+
+    def run(self, name, callback, args):
+        del self.jobs[name]
+        callback(*args)
+
+
+class HistoryView:
+    """Scrollable history list that only renders the rows in view
+
+    The rows come from a source with len() and indexing, such as History
+    or a list of search results, and are turned into text only while they
+    are on screen. Each redraw replaces the visible rows in one insert, so
+    its cost depends on the number of visible rows, not on the history size.
+    """
+
+    def __init__(self, parent, scheduler, rows=10, font=("Times New Roman", 10), width=30):
+        self.scheduler = scheduler
+        self.rows = rows
+        self.source = []
+        self.empty_text = ""
+        self.top = 0
+        self.text = tk.Text(parent, width=width, height=rows, font=font,
+                            wrap=tk.NONE, state="disabled")
+        self.scrollbar = tk.Scrollbar(parent, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y", pady=5)
+        self.text.pack(side="left", fill="both", expand=True, padx=(5, 0), pady=5)
+        # The Text scrolls through rows we choose, never on its own
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.text.bind(sequence, self.on_wheel)
+
+    def show(self, source, empty_text="", at_end=True):
+        """Display a new source, scrolled to its newest rows by default"""
+        self.source = source
+        self.empty_text = empty_text
+        self.top = max(0, len(source) - self.rows) if at_end else 0
+        self.redraw()
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), len(self.source) - self.rows))
+        if top != self.top:
+            self.top = top
+            self.schedule_redraw()
+
+    def yview(self, *args):
+        """Scrollbar command: ('moveto', fraction) or ('scroll', count, units)"""
+        if args[0] == 'moveto':
+            self.scroll_to(float(args[1]) * len(self.source))
+        elif args[0] == 'scroll':
+            step = self.rows if args[2] == 'pages' else 1
+            self.scroll_to(self.top + int(args[1]) * step)
+
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.scroll_to(self.top - 3)
+        else:
+            self.scroll_to(self.top + 3)
+        return "break"
+
+    def schedule_redraw(self):
+        """Coalesce scroll events into one redraw when Tk is idle"""
+        self.scheduler.idle('history-view', self.redraw)
+
+    def redraw(self):
+        self.scheduler.cancel('history-view')
+        count = len(self.source)
+        if count:
+            end = min(count, self.top + self.rows)
+            lines = "\n".join(str(self.source[i]) for i in range(self.top, end))
+            self.scrollbar.set(self.top / count, end / count)
+        else:
+            lines = self.empty_text
+            self.scrollbar.set(0, 1)
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", lines)
+        self.text.configure(state="disabled")
+
+
+class DisplayRenderer:
+    """Keeps the calculator display in sync by editing only what changed
+
+    The display holds the equation on its first line, followed by the result
+    right-aligned two lines below. show() records what should be on screen
+    and schedules one redraw per idle pass, so a burst of keys costs a
+    single update. The equation comes as the IncrementalExpression being
+    typed: the redraw asks it for the characters changed since the last
+    redraw, deletes the ones that went and translates only the new ones to
+    display symbols, so typing or deleting a key costs the same however
+    long the equation is.
+    """
+
+    def __init__(self, display, symbols, scheduler):
+        self.display = display
+        self.scheduler = scheduler
+        self.symbols = symbols
+        # What is on screen now: the equation's length, its suffix and the result
+        self.length = 0
+        self.suffix = ""
+        self.result = ""
+        self.message = None
+        # What should be on screen after the next redraw
+        self.target = (None, "", "", None)
+
+    def show(self, typed, suffix="", result=""):
+        """Show the equation being typed, a suffix after it such as " =" and a result line"""
+        self.target = (typed, suffix, result, None)
+        self.schedule_redraw()
+
+    def show_message(self, text):
+        """Replace the whole display with a message such as an error"""
+        self.target = (None, "", "", text)
+        self.schedule_redraw()
+
+    def schedule_redraw(self):
+        self.scheduler.idle('display', self.redraw)
+
+    def redraw(self):
+        """Apply the pending changes now"""
+        self.scheduler.cancel('display')
+        typed, suffix, result, message = self.target
+        display = self.display
+        if message is not None or self.message is not None:
+            display.delete("1.0", "end")
+            self.length, self.suffix, self.result = 0, "", ""
+            self.message = message
+            if message is not None:
+                display.insert("1.0", message)
+                return
+
+        if result != self.result:
+            # The result follows the equation line, or starts the display
+            start = "2.0" if self.length else "1.0"
+            display.delete(start, "end")
+            if result:
+                display.insert(start, '\n')
+                display.insert("end", result, 'right')
+            self.result = result
+
+        old = self.length
+        keep, tail = typed.changes() if typed is not None else (0, "")
+        if keep > old:
+            # A message cleared the equation from the screen since the last redraw
+            keep, tail = 0, typed.equation
+        length = keep + len(tail)
+        if keep == old == length and suffix == self.suffix:
+            return
+        if not length or not old:
+            display.delete("1.0", "2.0" if old else "1.0")
+            if length:
+                display.insert("1.0", self.symbols(tail) + suffix + '\n')
+        else:
+            if self.suffix:
+                display.delete(f"1.{old}", f"1.{old + len(self.suffix)}")
+            # Usually one character is added or removed
+            if keep < old:
+                display.delete(f"1.{keep}", f"1.{old}")
+            if tail or suffix:
+                display.insert(f"1.{keep}", self.symbols(tail) + suffix)
+        self.length = length
+        self.suffix = suffix
+
+
+class CalculatorApp:
+    """What both calculator windows share, whatever their layout
+
+    A subclass creates the Tk window and passes it to __init__, then builds
+    self.display with its DisplayRenderer in self.renderer, the keypad in
+    self.button_widgets from buttons_normal and buttons_convert, and binds
+    on_first_expose to the display's first <Expose>. The history view is
+    the subclass's own show_history().
+    """
+
+    # Grid row of the first keypad row
+    first_button_row = 1
+    # Refuse a second decimal point in the number being typed
+    one_point_per_number = False
+
+    def __init__(self, window, history_path=DEFAULT_PATH):
+        self.window = window
+        # Headless engine holding evaluation, history and conversions
+        self.engine = CalculatorEngine()
+        # Saved history is loaded once the window is up, see finish_startup
+        self.history_path = history_path
+        # Launch time to report the first interactive frame against, if asked to
+        self.startup_began = None
+        # Convert each result to BIN and FRACTION while the loop is idle
+        self.eager_conversions = True
+        # Per-action timings, only collected after enable_metrics()
+        self.metrics = None
+        self.profile_path = None
+        self.convert_mode = False
+        # Cells that differ between the normal and convert keypads
+        self.layout_changes = None
+        # Deadlines and deferred work run on the Tk main loop
+        self.scheduler = Scheduler(window)
+        # Equation as typed, evaluated incrementally key by key
+        self.typed = IncrementalExpression()
+        self.result = ""
+        # Show the running result under the equation while typing
+        self.live_preview = False
+
+    def on_first_expose(self, event):
+        self.display.unbind('<Expose>')
+        self.scheduler.idle('startup', self.finish_startup)
+
+    def finish_startup(self):
+        """Work deferred until the window is interactive"""
+        if self.startup_began is not None:
+            print(f"First interactive frame after {(time.perf_counter() - self.startup_began) * 1000:.1f} ms")
+            self.window.quit()
+            return
+        # Keep history across restarts unless no database path is given
+        if self.history_path:
+            # Commits are timed by the scheduler, see click('=')
+            self.engine.history.attach(HistoryStore(self.history_path, flush_interval=None))
+
+    def enable_metrics(self, path=None, profile_path=None):
+        """Time every action and redraw, count errors and optionally profile
+
+        Metrics are written to path every few seconds and on exit, and cProfile
+        stats to profile_path on exit. Until this is called the calculator
+        runs without any wrappers.
+        """
+        from calculator_metrics import Metrics
+        self.metrics = Metrics(self.engine, path)
+        self.click = self.metrics.timed_click(self.click)
+        self.renderer.redraw = self.metrics.timed('redraw', self.renderer.redraw)
+        self.engine.error_message = self.metrics.counted_errors(self.engine.error_message)
+        if profile_path:
+            self.profile_path = profile_path
+            self.metrics.start_profile()
+        if path:
+            self.scheduler.schedule('metrics', METRICS_EXPORT_MS, self.export_metrics)
+
+    def export_metrics(self):
+        self.metrics.export()
+        self.scheduler.schedule('metrics', METRICS_EXPORT_MS, self.export_metrics)
+
+    def set_numbers(self, numbers):
+        """Evaluate with floats, exact fractions or fixed-precision decimals from now on"""
+        self.engine.numbers = numbers
+        self.typed.numbers = numbers
+        self.typed.reset(self.equation)
+
+    @property
+    def equation(self):
+        return self.typed.equation
+
+    @equation.setter
+    def equation(self, value):
+        self.typed.reset(value)
+
+    @property
+    def history(self):
+        return self.engine.history
+
+    @property
+    def last_result(self):
+        return self.engine.last_result
+
+    @last_result.setter
+    def last_result(self, value):
+        self.engine.last_result = value
+
+    def switch_buttons(self, to_convert_mode):
+        # Built on the first switch; most cells are the same in both layouts
+        if self.layout_changes is None:
+            self.layout_changes = self.diff_layouts(self.first_button_row)
+
+        # Update button text and commands
+        for key, normal, convert in self.layout_changes:
+            button_text, button_value = convert if to_convert_mode else normal
+            cmd = lambda x=button_value: self.click(x)
+            self.button_widgets[key].configure(text=button_text, command=cmd)
+
+    def diff_layouts(self, first_row):
+        """(key, normal, convert) for each cell whose button differs between layouts"""
+        changes = []
+        for i, (normal, convert) in enumerate(zip(self.buttons_normal, self.buttons_convert)):
+            key = f"{first_row + i // 4},{i % 4}"
+            if normal != convert and key in self.button_widgets:
+                changes.append((key, normal, convert))
+        return changes
+
+    def start_convert_timer(self):
+        # Restarting the deadline replaces the previous one
+        self.scheduler.schedule('convert', CONVERT_TIMEOUT_MS, self.switch_to_normal)
+
+    def switch_to_normal(self):
+        if self.convert_mode:
+            self.convert_mode = False
+            self.switch_buttons(False)
+
+    def update_display(self):
+        # Display equation at top-left and result at bottom-right
+        result = self.result
+        if not result and self.live_preview and self.typed:
+            preview = self.typed.preview()
+            if preview is not None:
+                result = self.engine.format_number(preview)
+        self.renderer.show(self.typed, " =" if self.result else "", result)
+
+    def click(self, value):
+        if value == '=':
+            try:
+                # Only check for actual equation content if there is any
+                if self.equation:
+                    result = self.engine.compute(self.equation, self.typed.result)
+                    self.result = self.engine.accept(self.equation, result)
+                    self.update_display()
+                    # Commit once calculations pause instead of after every one
+                    self.scheduler.schedule('history', HISTORY_COMMIT_MS, self.history.commit)
+                    if self.eager_conversions:
+                        # BIN and FRACTION are ready before they are pressed
+                        self.scheduler.idle('conversions', self.engine.precompute_conversions,
+                                            self.last_result)
+            except Exception as e:
+                if not isinstance(e, (ZeroDivisionError, SyntaxError, OverflowError, ValueError)):
+                    print(f"Calculation error: {e}", file=sys.stderr)  # For debugging
+                self.renderer.show_message(self.engine.error_message(e))
+                self.equation = ""
+                self.result = ""
+                self.last_result = None
+        elif value == 'CLR':
+            self.equation = ""
+            self.result = ""
+            self.last_result = None
+            self.update_display()
+        elif value == '⌫':
+            self.typed.pop()
+            self.result = ""
+            self.update_display()
+        elif value == 'H':
+            self.show_history()
+        elif value == 'convert':
+            if self.convert_mode:
+                self.convert_mode = False
+                self.scheduler.cancel('convert')
+                self.switch_buttons(False)
+            else:
+                self.convert_mode = True
+                self.switch_buttons(True)
+                self.start_convert_timer()
+        elif value == 'bin':
+            if self.last_result is not None:
+                binary_result = self.engine.to_binary(self.last_result, cached=True)
+                self.result = binary_result
+                self.update_display()
+        elif value == 'fraction':
+            if self.last_result is not None:
+                fraction_result = self.engine.to_fraction(self.last_result, cached=True)
+                self.result = fraction_result
+                self.update_display()
+        else:
+            # Prevent multiple decimal points in a number
+            if value == '.' and self.one_point_per_number and number_has_point(self.typed.chars):
+                return
+            self.typed.push(value)
+            self.result = ""
+            self.update_display()
+
+    def run(self):
+        self.window.mainloop()
+        # Commit history still waiting for the background writer
+        self.engine.history.close()
+        if self.metrics is not None:
+            if self.profile_path:
+                self.metrics.stop_profile(self.profile_path)
+            self.metrics.export()
+
+
+def main(app, started, argv=None):
+    """Command line of both calculators: open app with the given options and run it
+
+    started is the perf_counter() value at launch, for --startup-time.
+    """
+    parser = argparse.ArgumentParser(description="Calculator")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="print the time to the first interactive frame and exit")
+    parser.add_argument('--metrics', metavar='PATH',
+                        help="write action latencies, error counts and cache hit rates to PATH as JSON")
+    parser.add_argument('--profile', metavar='PATH', help="write cProfile stats to PATH on exit")
+    parser.add_argument('--numbers', choices=sorted(NUMBERS), default='float',
+                        help="float, exact fractions or decimals to 28, 50 or 100 digits (default: float)")
+    args = parser.parse_args(argv)
+    calc = app()
+    if args.startup_time:
+        calc.startup_began = started
+    calc.set_numbers(NUMBERS[args.numbers])
+    if args.metrics or args.profile:
+        calc.enable_metrics(args.metrics, args.profile)
+    calc.run()
+    return 0
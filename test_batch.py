@@ -0,0 +1,41 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from calculator_engine import CalculatorEngine
+
+
+def test_template_masks_and_formats_each_element():
+    engine = CalculatorEngine()
+    batch = engine.evaluate_template('x/y+1', x=[1, 2, 3, 4], y=[2, 0, 3, 1e-200])
+    assert batch.mask.tolist() == [False, True, False, True]
+    assert batch.errors().tolist() == ["", "DIVISION BY ZERO", "", "NUMBER TOO LARGE"]
+    assert np.isnan(batch.values[batch.mask]).all()
+    assert batch.formatted().tolist() == ['1.5', "DIVISION BY ZERO", '2', "NUMBER TOO LARGE"]
+
+
+def test_template_without_variables_is_one_element():
+    engine = CalculatorEngine()
+    assert engine.evaluate_template('7/2').formatted().tolist() == ['3.5']
+    assert engine.evaluate_template('9' * 400 + '*1').formatted().tolist() == ["NUMBER TOO LARGE"]
+
+
+def test_template_errors_in_the_template_raise():
+    engine = CalculatorEngine()
+    with pytest.raises(ZeroDivisionError):
+        engine.evaluate_template('x/0', x=[1, 2])
+    with pytest.raises(ValueError):
+        engine.evaluate_template('x+', x=[1, 2])
+
+
+def test_column_matches_calculate():
+    engine = CalculatorEngine()
+    rng = random.Random(4)
+    weights = [6, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 2, 2, 2, 3]
+    equations = [''.join(rng.choices("0123456789.+-*/", weights, k=rng.randint(1, 12)))
+                 for _ in range(5000)]
+    equations += ['(1+2)*3', '2*(3+(4-1))/3', '((5)', '1/(2-2)']
+    expected = [engine.calculate(equation, record=False) for equation in equations]
+    assert engine.evaluate_column(equations).formatted().tolist() == expected
@@ -0,0 +1,45 @@
+import json
+
+from calculator_bench import build_suite, compare, main, measure
+from calculator_numbers import NUMBERS
+
+
+def test_bench_suite_builds():
+    suite = build_suite(include_gui=False)
+    for name in NUMBERS:
+        assert f'evaluate_short_{name}' in suite
+        assert f'evaluate_decimals_{name}' in suite
+    # Every benchmark can be set up and run once
+    for name, factory in suite.items():
+        run, ops = factory()
+        assert ops > 0, name
+        run()
+
+
+def test_measure():
+    calls = []
+    result = measure(lambda: calls.append(1), 10, repeat=3, min_time=0.001)
+    assert result['best_us'] <= result['median_us']
+    # Only the timed samples count, not the calls sizing them
+    assert result['operations'] % 30 == 0
+    assert result['operations'] < len(calls) * 10
+
+
+def test_compare_flags_regressions():
+    baseline = {'results': {'a': {'best_us': 1.0}, 'b': {'best_us': 2.0}}}
+    report = {'results': {'a': {'best_us': 1.2}, 'b': {'best_us': 3.0}, 'c': {'best_us': 1.0}}}
+    assert compare(report, baseline, threshold=0.25) == [
+        ('a', 1.0, 1.2, 1.2, False), ('b', 2.0, 3.0, 1.5, True)]
+
+
+def test_main_fails_on_a_regression(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    args = ['format_number', '--no-gui', '--repeat', '1', '--min-time', '0.001',
+            '--baseline', str(baseline)]
+    assert main(args + ['--save-baseline']) == 0
+    report = json.loads(baseline.read_text())
+    assert list(report['results']) == ['format_number']
+    # A baseline far faster than any machine makes the run a regression
+    report['results']['format_number']['best_us'] = 1e-9
+    baseline.write_text(json.dumps(report))
+    assert main(args + ['--output', str(tmp_path / 'out.json')]) == 1
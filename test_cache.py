@@ -0,0 +1,74 @@
+import pytest
+
+from calculator_cache import CacheEntry, ConversionCache, ExpressionCache
+from calculator_engine import CalculatorEngine
+
+
+def test_least_recently_used_goes_first():
+    cache = ExpressionCache(max_entries=3)
+    for key in ('1+1', '2+2', '3+3'):
+        cache.put(key, CacheEntry(None, 0))
+    # Reading an entry makes it the most recently used
+    assert cache.get('1+1') is not None
+    cache.put('4+4', CacheEntry(None, 0))
+    assert list(cache.entries) == ['3+3', '1+1', '4+4']
+    assert cache.get('2+2') is None
+
+
+def test_character_budget():
+    cache = ExpressionCache(max_entries=100, max_chars=10)
+    cache.put('1+2+3', CacheEntry(None, 6))
+    cache.put('4+5+6', CacheEntry(None, 15))
+    assert cache.chars == 10
+    cache.put('7+8', CacheEntry(None, 15))
+    assert list(cache.entries) == ['4+5+6', '7+8'] and cache.chars == 8
+    # Replacing an entry does not count its key twice
+    cache.put('7+8', CacheEntry(None, 15))
+    assert cache.chars == 8
+    # Too long to ever fit, so it is not stored at all
+    cache.put('1' * 11, CacheEntry(None, 0))
+    assert len(cache) == 2
+
+
+def test_resize_evicts():
+    cache = ExpressionCache(max_entries=10)
+    for i in range(10):
+        cache.put(str(i), CacheEntry(None, i))
+    cache.resize(max_entries=4)
+    assert list(cache.entries) == ['6', '7', '8', '9']
+    cache.resize(max_entries=0)
+    cache.put('1', CacheEntry(None, 1))
+    assert len(cache) == 0
+
+
+def test_counters():
+    cache = ExpressionCache()
+    assert cache.hit_rate() == 0.0
+    cache.put('1', CacheEntry(None, 1))
+    cache.get('1')
+    cache.get('1')
+    cache.get('2')
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert cache.hit_rate() == pytest.approx(2 / 3)
+    cache.clear()
+    assert (cache.hits, cache.misses, cache.chars, len(cache)) == (0, 0, 0, 0)
+
+
+def test_conversion_texts_count_their_length():
+    cache = ConversionCache(max_entries=10, max_chars=8)
+    cache.put(ConversionCache.key('bin', 5, 10), '101')
+    cache.put(ConversionCache.key('bin', 255, 10), '11111111')
+    assert len(cache) == 1 and cache.chars == 8
+    # 5 and 5.0 convert differently, so they are different keys
+    assert ConversionCache.key('bin', 5, 10) != ConversionCache.key('bin', 5.0, 10)
+
+
+def test_engine_reuses_outcomes():
+    engine = CalculatorEngine()
+    assert engine.compute('7/2') == 3.5
+    assert engine.compute(' 7/2 ') == 3.5
+    assert (engine.cache.hits, engine.cache.misses) == (1, 1)
+    for _ in range(2):
+        with pytest.raises(ZeroDivisionError):
+            engine.compute('1/0')
+    assert (engine.cache.hits, engine.cache.misses) == (2, 2)
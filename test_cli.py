@@ -0,0 +1,62 @@
+import io
+import json
+import random
+
+import pytest
+
+from calculator_cli import main, run, run_parallel
+from calculator_engine import CalculatorEngine
+from calculator_numbers import NUMBERS
+
+
+def run_text(text, output_format='text', **options):
+    out = io.StringIO()
+    run(io.StringIO(text), out, output_format, **options)
+    return out.getvalue()
+
+
+def test_run_writes_one_line_per_input_line():
+    text = "7/2\n5/0\n\n1+\n12+3*5\r\n1/3"
+    assert run_text(text) == "3.5\nDIVISION BY ZERO\n\nINCOMPLETE EQUATION\n27\n0.333\n"
+
+
+def test_run_writes_json_lines():
+    lines = run_text("7/2\n5/0\n", 'jsonl').splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"expression": "7/2", "result": "3.5"},
+        {"expression": "5/0", "error": "DIVISION BY ZERO"},
+    ]
+
+
+def test_run_buffers_without_changing_the_output():
+    text = ''.join(f"{i}*3\n" for i in range(1000))
+    assert run_text(text, buffer_lines=7) == run_text(text) == ''.join(f"{i * 3}\n" for i in range(1000))
+
+
+def test_main_reads_a_file(tmp_path, capsys):
+    path = tmp_path / 'expressions.txt'
+    path.write_text("1/3\n2*(3+4)\n")
+    assert main([str(path), '--numbers', 'exact']) == 0
+    assert capsys.readouterr().out == "0.333\n14\n"
+
+
+@pytest.mark.parametrize('output_format', ['text', 'jsonl'])
+@pytest.mark.parametrize('numbers', ['float', 'decimal50'])
+def test_parallel_output_matches_serial(output_format, numbers):
+    rng = random.Random(6)
+    weights = [6, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 2, 2, 2, 3]
+    text = ''.join(''.join(rng.choices("0123456789.+-*/", weights, k=rng.randint(0, 12))) + '\n'
+                   for _ in range(3000))
+    out = io.StringIO()
+    run_parallel(io.StringIO(text), out, output_format, workers=2, chunk_lines=101,
+                 numbers=NUMBERS[numbers])
+    serial = run_text(text, output_format, engine=CalculatorEngine(NUMBERS[numbers]))
+    assert out.getvalue() == serial
+
+
+def test_main_rejects_negative_counts(capsys):
+    for option in ('--workers', '--chunk-lines', '--buffer-lines'):
+        with pytest.raises(SystemExit) as raised:
+            main(['-', option, '-1'])
+        assert raised.value.code == 2
+        assert "must be at least" in capsys.readouterr().err
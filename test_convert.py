@@ -0,0 +1,84 @@
+import math
+import random
+from fractions import Fraction
+
+import pytest
+
+from calculator_convert import rational, to_base, to_bases, to_fraction, to_fractions
+
+
+def test_to_base_integers_round_trip():
+    rng = random.Random(10)
+    for base in range(2, 37):
+        for bits in (1, 8, 63, 64, 65, 300, 5000):
+            n = rng.getrandbits(bits) * rng.choice((1, -1))
+            assert int(to_base(n, base), base) == n
+
+
+def test_to_base_fractional_digits_are_truncated_exactly():
+    rng = random.Random(11)
+    for _ in range(2000):
+        base = rng.randint(2, 36)
+        number = rng.uniform(-1e6, 1e6)
+        text = to_base(number, base, 10)
+        whole, _, digits = text.lstrip('-').partition('.')
+        value = Fraction(int(whole, base)) + sum(
+            Fraction(int(digit, base), base ** place) for place, digit in enumerate(digits, 1))
+        exact = abs(Fraction(number))
+        assert value <= exact < value + Fraction(1, base ** 10)
+        assert text.startswith('-') == (number < 0)
+
+
+def test_to_base_exact_inputs():
+    assert to_base(Fraction(1, 3), 3) == '0.1'
+    assert to_base(Fraction(-7, 2), 2) == '-11.1'
+    assert to_base(0.1, 2, 8) == '0.00011001'
+    assert to_base(255, 16) == 'FF'
+    assert to_base(0, 7) == '0'
+
+
+def test_to_base_rejects_bad_bases_quietly(capsys):
+    for base in (0, 1, 37):
+        with pytest.raises(ValueError):
+            to_base(5, base)
+    assert to_base(float('nan'), 2) == "CANNOT CONVERT TO BINARY"
+    assert to_base(float('inf'), 16) == "CANNOT CONVERT TO HEX"
+    assert to_base(float('nan'), 5) == "CANNOT CONVERT TO BASE 5"
+    assert capsys.readouterr() == ('', '')
+
+
+def test_to_bases_converts_a_column():
+    assert to_bases([1, 2.5, 1, -3], 2) == ['1', '10.1', '1', '-11']
+
+
+def test_rational_finds_the_smallest_exact_fraction():
+    rng = random.Random(9)
+    for _ in range(2000):
+        q = rng.randint(1, 1000)
+        p = rng.randint(-10000, 10000)
+        exact = Fraction(p, q)
+        # No smaller denominator gives the same float, so it is the reduced p/q
+        assert rational(p / q) == (exact.numerator, exact.denominator), (p, q)
+
+
+def test_rational_limits():
+    assert rational(2.0) == (2, 1)
+    assert rational(7) == (7, 1)
+    assert rational(Fraction(1, 3)) == (1, 3)
+    # No convergent of pi within the limit is exactly the float
+    assert rational(math.pi) is None
+    assert rational(Fraction(1, 10 ** 7)) is None
+    assert rational(0.001, max_denominator=100) is None
+
+
+@pytest.mark.parametrize('number, text', [
+    (0, "0/1"), (0.5, "1/2"), (-0.75, "-3/4"), (1 / 3, "1/3"), (0.1, "1/10"), (2.0, "2"),
+    (math.pi, "FRACTION TOO COMPLEX"), (1e11, "NUMBER TOO LARGE"), (math.inf, "NUMBER TOO LARGE"),
+    (math.nan, "CANNOT CONVERT TO FRACTION"),
+])
+def test_to_fraction(number, text):
+    assert to_fraction(number) == text
+
+
+def test_to_fractions_converts_a_column():
+    assert to_fractions([0.5, 0.25, 0.5, 3]) == ["1/2", "1/4", "1/2", "3"]
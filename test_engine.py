@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from calculator_engine import CalculatorEngine
+
+
+def calculator_py_equals(engine, equation):
+    """What calculator.py's '=' showed before the engine: its checks, then eval()"""
+    try:
+        if equation[-1] in ['*', '/', '+', '-']:
+            raise ValueError("INCOMPLETE EQUATION")
+        if '/0' in equation:
+            if equation.endswith('/0'):
+                raise ZeroDivisionError("DIVISION BY ZERO")
+            for part in equation.split('/')[1:]:
+                if part.strip().startswith('0') and not '.' in part:
+                    raise ZeroDivisionError("DIVISION BY ZERO")
+        prev_char = ''
+        for char in equation:
+            if char in '*/+-' and prev_char in '*/+-':
+                raise ValueError("INVALID OPERATOR SEQUENCE")
+            prev_char = char
+        result = eval(equation)
+        engine.check_result(result)
+        return engine.format_number(result)
+    except Exception as e:
+        return engine.error_message(e)
+
+
+def calculator_py_engine():
+    engine = CalculatorEngine()
+    engine.trailing_point = True
+    engine.whole_fractions = True
+    engine.binary_fractions = False
+    return engine
+
+
+@pytest.mark.parametrize('equation', ['5.', '.', '4-.', '10/.', '1/0.', '5..', '1.5.', '9/03/.', '2*.'])
+def test_trailing_point_as_calculator_py_had_it(equation):
+    engine = calculator_py_engine()
+    assert engine.calculate(equation) == calculator_py_equals(engine, equation)
+    # Errors are cached; the second answer comes from the cache
+    assert engine.calculate(equation) == calculator_py_equals(engine, equation)
+
+
+def test_trailing_point_matches_calculator_py_random():
+    engine = calculator_py_engine()
+    rng = random.Random(3)
+    weights = [6, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 2, 2, 2, 3]
+    for _ in range(20000):
+        equation = ''.join(rng.choices("0123456789.+-*/", weights, k=rng.randint(1, 10)))
+        if '...' in equation:
+            continue
+        assert engine.calculate(equation, record=False) == calculator_py_equals(engine, equation), equation
+
+
+def test_calculator_py_conversions():
+    engine = calculator_py_engine()
+    engine.evaluate('5.')
+    assert (engine.to_fraction(engine.last_result), engine.to_binary(engine.last_result)) == ('5/1', '101')
+    engine.evaluate('7/2')
+    assert (engine.to_fraction(engine.last_result), engine.to_binary(engine.last_result)) == (
+        '7/2', "DECIMALS NOT SUPPORTED")
+
+
+def test_default_options_are_calculator_1_2s():
+    engine = CalculatorEngine()
+    assert engine.calculate('5.') == "INCOMPLETE EQUATION"
+    engine.evaluate('5')
+    assert (engine.to_fraction(engine.last_result), engine.to_binary(engine.last_result)) == ('5', '101')
+    engine.evaluate('7/2')
+    assert engine.to_binary(engine.last_result) == '11.1'
@@ -0,0 +1,87 @@
+from calculator_history import History, HistoryStore
+
+
+def make_history(path, capacity, count):
+    """A History over a store holding count rows, one second apart"""
+    store = HistoryStore(str(path), flush_interval=None)
+    history = History(capacity)
+    history.attach(store)
+    for i in range(count):
+        history.append(f"{i}+1", i + 1.0, created=1000.0 + i)
+    store.flush()
+    return history, store
+
+
+def test_store_keeps_what_the_ring_drops(tmp_path):
+    history, store = make_history(tmp_path / 'history.sqlite3', 10, 250)
+    assert len(history) == 10
+    assert store.count() == 250
+    assert store.count(before=history[0].created) == 240
+    assert store.id_range(history[0].created) == (1, 241)
+    history.close()
+
+    reopened = History(10)
+    reopened.attach(HistoryStore(str(tmp_path / 'history.sqlite3')))
+    assert [entry.equation for entry in reopened] == [f"{i}+1" for i in range(240, 250)]
+    reopened.close()
+
+
+def test_full_history_pages_through_the_store(tmp_path):
+    history, store = make_history(tmp_path / 'history.sqlite3', 10, 250)
+    full = history.full()
+    assert len(full) == 250
+    assert [full[i].equation for i in (0, 99, 100, 239, 240, -1)] == [
+        '0+1', '99+1', '100+1', '239+1', '240+1', '249+1']
+    assert [full[i].equation for i in range(len(full))] == [f"{i}+1" for i in range(250)]
+    history.close()
+
+
+def test_full_history_without_older_rows(tmp_path):
+    history, store = make_history(tmp_path / 'history.sqlite3', 100, 5)
+    full = history.full()
+    assert [full[i].equation for i in range(len(full))] == [
+        f"{i}+1" for i in range(5)]
+    history.close()
+    empty = History(10)
+    empty.attach(HistoryStore(str(tmp_path / 'empty.sqlite3')))
+    assert len(empty.full()) == 0
+    empty.close()
+
+
+def test_search_goes_on_in_the_store(tmp_path):
+    history, store = make_history(tmp_path / 'history.sqlite3', 10, 250)
+    # Newest first: the ring's matches, then the store's older rows
+    assert [entry.equation for entry in history.search(prefix='24', limit=5)] == [
+        '249+1', '248+1', '247+1', '246+1', '245+1']
+    assert [entry.equation for entry in history.search(prefix='23', limit=3)] == [
+        '239+1', '238+1', '237+1']
+    assert [entry.result for entry in history.search(low=5, high=7)] == [7.0, 6.0, 5.0]
+    assert [entry.equation for entry in history.search(text='7+', start=1005, end=1020)] == ['17+1', '7+1']
+    history.close()
+
+
+def test_popup_queries(tmp_path):
+    history, store = make_history(tmp_path / 'history.sqlite3', 10, 50)
+    assert [entry.equation for entry in history.query('=3')] == ['2+1']
+    assert [entry.equation for entry in history.query(' = 3. ')] == ['2+1']
+    assert [entry.equation for entry in history.query('2..3')] == ['2+1', '1+1']
+    # Half-typed numbers are not results to look up
+    for text in ('=.', '=-', '1...', '=1e5', '=nan', '=inf'):
+        assert [entry.equation for entry in history.query(text)] == [
+            entry.equation for entry in history.search(text=text.strip())]
+    assert [entry.equation for entry in history.query('4×')] == []
+    history.close()
+
+
+def test_query_later_matches_query(tmp_path):
+    history, store = make_history(tmp_path / 'history.sqlite3', 10, 250)
+    for text in ('7+', '=3', '24', '245+', 'zz'):
+        entries, older = history.query_later(text, limit=20)
+        if older is not None:
+            entries = entries + history.entries(older.result(timeout=10))
+        assert [entry.equation for entry in entries] == [
+            entry.equation for entry in history.query(text, limit=20)], text
+    # The ring alone fills the limit, so the store is not searched
+    entries, older = history.query_later('+1', limit=5)
+    assert older is None and len(entries) == 5
+    history.close()
@@ -0,0 +1,70 @@
+from decimal import Decimal
+
+import pytest
+
+from calculator_engine import CalculatorEngine
+from calculator_numbers import DECIMAL_TIERS, NUMBERS
+from calculator_parser import IncrementalExpression
+
+
+@pytest.mark.parametrize('numbers', list(NUMBERS))
+def test_division_by_zero_in_every_number_system(numbers):
+    engine = CalculatorEngine(NUMBERS[numbers])
+    for equation in ('5/0', '0/0.0', '5/0.0', '1+2/0.0*3'):
+        assert engine.calculate(equation) == "DIVISION BY ZERO"
+    expression = IncrementalExpression(numbers=NUMBERS[numbers])
+    expression.extend('0/0.0+1')
+    with pytest.raises(ZeroDivisionError):
+        expression.result()
+    expression.pop()
+    expression.pop()
+    assert expression.equation == '0/0.0'
+    expression.extend('+2')
+    with pytest.raises(ZeroDivisionError):
+        expression.result()
+
+
+def test_history_shows_decimal_results_unrounded():
+    engine = CalculatorEngine(NUMBERS['decimal50'])
+    engine.evaluate('1/3')
+    assert engine.history.recent(1) == ['1÷3 = 0.' + '3' * 50]
+    assert engine.history[-1].result == Decimal('0.' + '3' * 50)
+
+
+@pytest.mark.parametrize('numbers', [system.name for system in DECIMAL_TIERS] + ['exact'])
+def test_whole_results_keep_every_digit(numbers):
+    engine = CalculatorEngine(NUMBERS[numbers])
+    assert engine.calculate('12345678901234567890*3') == '37037036703703703670'
+    assert engine.calculate('12345678901234567890/10') == '1234567890123456789'
+    assert engine.history.recent(1) == ['12345678901234567890÷10 = 1234567890123456789']
+
+
+def test_float_mode_rounds_whole_results_as_before():
+    assert CalculatorEngine().calculate('12345678901234567890*3') == '37037036703703703552'
+
+
+def test_decimal_tiers_round_to_their_precision():
+    for system in DECIMAL_TIERS:
+        text = CalculatorEngine(system).calculate('2/3')
+        assert text == '0.' + '6' * (system.precision - 1) + '7'
+
+
+def test_exact_mode_shows_its_fractions_without_limits():
+    engine = CalculatorEngine(NUMBERS['exact'])
+    for equation, fraction in (('1/1234567', '1/1234567'), ('123456789012/7', '123456789012/7'),
+                               ('0.1+0.2', '3/10'), ('2*3', '6'), ('0*5', '0/1')):
+        engine.evaluate(equation)
+        assert engine.to_fraction(engine.last_result) == fraction
+        assert engine.to_fraction(engine.last_result, cached=True) == fraction
+    engine.whole_fractions = True
+    assert engine.to_fraction(engine.last_result) == '0/1'
+    engine.evaluate('123456789012*100')
+    assert engine.to_fraction(engine.last_result) == '12345678901200/1'
+
+
+def test_float_mode_keeps_the_fraction_limits():
+    engine = CalculatorEngine()
+    engine.evaluate('1/1234567')
+    assert engine.to_fraction(engine.last_result) == "FRACTION TOO COMPLEX"
+    engine.evaluate('123456789012/7')
+    assert engine.to_fraction(engine.last_result) == "NUMBER TOO LARGE"
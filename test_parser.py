@@ -0,0 +1,178 @@
+import random
+
+import pytest
+
+from calculator_engine import CalculatorEngine
+from calculator_numbers import EXACT
+from calculator_parser import IncrementalExpression, keypad_keys, number_has_point, parse
+
+
+def old_equals(equation):
+    """What '=' showed before the parser: the old string checks, then eval()"""
+    try:
+        if equation[-1] in ['*', '/', '+', '-', '.']:
+            raise ValueError("INCOMPLETE EQUATION")
+        if '/0' in equation.replace(' ', ''):
+            if equation.replace(' ', '').endswith('/0'):
+                raise ZeroDivisionError("DIVISION BY ZERO")
+            parts = equation.split('/')
+            for part in parts[1:]:
+                if part.strip().startswith('0') and not '.' in part:
+                    raise ZeroDivisionError("DIVISION BY ZERO")
+        prev_char = ''
+        for char in equation:
+            if char in '*/+-' and prev_char in '*/+-':
+                raise ValueError("INVALID OPERATOR SEQUENCE")
+            prev_char = char
+        return check(eval(equation))
+    except Exception as e:
+        return message(e)
+
+
+def check(result):
+    if abs(result) > 1e100:
+        raise OverflowError("NUMBER TOO LARGE")
+    return repr(result)
+
+
+def message(error):
+    return CalculatorEngine().error_message(error)
+
+
+def parsed(equation):
+    try:
+        return check(parse(equation).evaluate())
+    except Exception as e:
+        return message(e)
+
+
+def typed(equation):
+    """Type the equation key by key, with a few backspaces and retyped keys"""
+    expression = IncrementalExpression()
+    for char in equation:
+        expression.push(char)
+        expression.push('5')
+        expression.pop()
+    try:
+        return check(expression.result())
+    except Exception as e:
+        return message(e)
+
+
+# Each error check of the old '=' against the ones after it
+ERROR_ORDER = [
+    '5', '5.', '.5', '5..5', '1.2.3', '12+3*5', '7/2', '-5+3', '+5', '*5', '5*-3',
+    '5+', '5/', '5/0', '5/0+', '5/0.0', '5/0.5', '5/00', '5/05', '5/0*3', '0/0',
+    '5/+0', '5++3', '5+*', '5+-0', '5/-0', '1/3/0', '1/0.', '10**3', '5/.0',
+    '007', '00', '-0', '5-0/0', '1/.5', '9' * 101, '9' * 101 + '/1', '1' + '0' * 100 + '*10',
+]
+
+
+@pytest.mark.parametrize('equation', ERROR_ORDER)
+def test_parser_matches_old_equals(equation):
+    assert parsed(equation) == old_equals(equation)
+    assert typed(equation) == parsed(equation)
+
+
+def test_parser_matches_old_equals_random():
+    rng = random.Random(1)
+    alphabet = "0123456789.+-*/"
+    weights = [6, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 2, 2, 2, 3]
+    for _ in range(20000):
+        equation = ''.join(rng.choices(alphabet, weights, k=rng.randint(1, 12)))
+        # eval() reads '...' as Ellipsis and failed on it with INVALID INPUT
+        if '...' in equation:
+            continue
+        assert parsed(equation) == old_equals(equation), equation
+        assert typed(equation) == parsed(equation), equation
+
+
+@pytest.mark.parametrize('equation, expected', [
+    ('(1+2)*3', '9'), ('2*(3+4)*(5-1)', '56'), ('((7))', '7'), ('1-(2-(3-(4)))', '-2'),
+    ('(1.5+.5)*2', '4.0'), ('(1+2)/(3-3)', "DIVISION BY ZERO"), ('(1/0)', "DIVISION BY ZERO"),
+    ('-(3)', "INVALID OPERATOR SEQUENCE"), ('5*-(3)', "INVALID OPERATOR SEQUENCE"),
+    ('(1+2', "SYNTAX ERROR"), ('1+2)', "SYNTAX ERROR"), ('()', "SYNTAX ERROR"),
+    ('2(3)', "SYNTAX ERROR"), ('(3)4', "SYNTAX ERROR"), ('(1+2)*', "INCOMPLETE EQUATION"),
+])
+def test_parentheses(equation, expected):
+    assert parsed(equation) == expected
+    assert typed(equation) == expected
+
+
+def random_nested(rng, depth):
+    if depth == 0 or rng.random() < 0.3:
+        return str(rng.randint(1, 9))
+    left = random_nested(rng, depth - 1)
+    right = random_nested(rng, depth - 1)
+    if rng.random() < 0.5:
+        right = f"({right})"
+    return f"{left}{rng.choice('+-*/')}{right}"
+
+
+def test_parentheses_match_eval():
+    rng = random.Random(3)
+    for _ in range(2000):
+        equation = random_nested(rng, 5)
+        try:
+            expected = check(eval(equation))
+        except Exception as e:
+            expected = message(e)
+        assert parsed(equation) == expected, equation
+
+
+def test_deep_nesting():
+    # Nesting costs memory rather than Python stack
+    depth = 100000
+    assert parse('(' * depth + '1+2' + ')' * depth).evaluate() == 3
+    assert parsed('(' * depth + '1+2' + ')' * (depth - 1)) == "SYNTAX ERROR"
+    assert parse('(1/3+1)*3', numbers=EXACT).evaluate() == 4
+
+@pytest.mark.parametrize('equation, expected', [
+    ('', False), ('1', False), ('1.', True), ('1.5', True), ('1.5+', False),
+    ('1.5+2', False), ('1.5+2.', True), ('(1.5)', False), ('(.', True),
+])
+def test_number_has_point(equation, expected):
+    assert number_has_point(equation) == expected
+
+
+@pytest.mark.parametrize('text, equation, keys', [
+    ('1.5+2.5', '', '1.5+2.5'),
+    ('1.2.3', '', '1.23'),
+    ('.5', '1.', '5'),
+    ('.5', '1.2+', '.5'),
+    ('(1 + 2.5) * 3', '', '(1+2.5)*3'),
+    ('abc', '', ''),
+])
+def test_keypad_keys(text, equation, keys):
+    assert keypad_keys(text, equation) == keys
+
+
+def test_keypad_keys_types_what_keys_would():
+    # Pasting a text is the same as typing it with the point rule applied
+    rng = random.Random(2)
+    for _ in range(2000):
+        text = ''.join(rng.choices("0123456789.+-*/() x", k=rng.randint(0, 12)))
+        equation = ''
+        for char in text:
+            if char in '0123456789+-*/()' or char == '.' and not number_has_point(equation):
+                equation += char
+        assert keypad_keys(text) == equation, text
+
+
+def test_changes_since_the_last_call():
+    typed = IncrementalExpression('12+3')
+    assert typed.changes() == (0, '12+3')
+    assert typed.changes() == (4, '')
+    typed.push('4')
+    typed.push('*')
+    assert typed.changes() == (4, '4*')
+    # Backspacing past what was read, then typing again
+    typed.pop()
+    typed.pop()
+    typed.pop()
+    typed.push('-')
+    assert typed.changes() == (3, '-')
+    typed.extend('5.5')
+    typed.reset('7')
+    assert typed.changes() == (0, '7')
+    assert typed.equation == '7' and len(typed) == 1
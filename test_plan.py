@@ -0,0 +1,31 @@
+import pytest
+
+from calculator_engine import CalculatorEngine
+from calculator_numbers import NUMBERS
+
+
+def test_ans_needs_a_previous_result():
+    engine = CalculatorEngine(NUMBERS['decimal28'])
+    plan = engine.compile('ANS*x')
+    with pytest.raises(ValueError, match="NO PREVIOUS RESULT"):
+        engine.run_plan(plan, x=2)
+    engine.last_result = 0.1
+    assert engine.run_plan(plan, x=3) == '0.3'
+    assert [text for _, text in engine.sweep('x/ANS', x=[1, 'a'])] == ['10', "INVALID INPUT"]
+
+
+def test_ans_is_the_last_result_unless_swept():
+    engine = CalculatorEngine()
+    engine.accept('7/2', engine.compute('7/2'))
+    assert engine.run_plan(engine.compile('ANS+1')) == '4.5'
+    assert engine.run_plan(engine.compile('ANS+1'), ANS=1) == '2'
+    assert [text for _, text in engine.sweep('ANS*x', x=[2, 4])] == ['7', '14']
+    assert [text for _, text in engine.sweep('ANS*2', ANS=[1, 2])] == ['2', '4']
+
+
+def test_plan_matches_the_substituted_equation():
+    engine = CalculatorEngine()
+    plan = engine.compile('x*1.08+12*3/4-x/7')
+    for x in range(1, 200):
+        assert engine.run_plan(plan, x=x) == engine.format_number(
+            engine.compute(f"{x}*1.08+12*3/4-{x}/7"))
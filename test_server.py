@@ -0,0 +1,61 @@
+import asyncio
+
+from calculator_server import CalculatorServer, request
+
+
+def serve(payloads, **options):
+    """Replies from a fresh server to payloads sent on one connection"""
+    async def run():
+        server = CalculatorServer(port=0, **options)
+        await server.start()
+        try:
+            replies = await request(payloads, port=server.port)
+            return replies + await request([{'stats': True}], port=server.port)
+        finally:
+            await server.close()
+
+    return asyncio.run(run())
+
+
+def test_server_answers_past_a_bad_request():
+    replies = serve([
+        {'id': 1, 'expression': '7/2', 'convert': 'bin'},
+        {'id': 2, 'expression': '7/2', 'convert': [1]},
+        {'id': 3, 'expression': '7/2', 'convert': ['bin', 'fraction']},
+        {'id': 4, 'expression': '5/0'},
+        {'id': 5},
+    ])
+    assert [reply.get('error') for reply in replies[:2]] == ["INVALID REQUEST", "INVALID REQUEST"]
+    assert (replies[2]['result'], replies[2]['binary'], replies[2]['fraction']) == ('3.5', '11.1', '7/2')
+    assert replies[3]['error'] == "DIVISION BY ZERO"
+    assert replies[4] == {'id': 5, 'error': "INVALID REQUEST", 'latency_ms': replies[4]['latency_ms']}
+    assert (replies[5]['requests'], replies[5]['errors']) == (5, 4)
+
+
+def test_server_skips_lines_over_the_limit():
+    long = '+'.join(['1'] * 3000)
+    replies = serve([
+        {'id': 1, 'expression': long},
+        {'id': 2, 'expression': '1+2'},
+        {'id': 3, 'expression': long[:501]},
+    ], max_line=1000)
+    assert replies[0] == {'error': "INVALID REQUEST"}
+    assert (replies[1]['id'], replies[1]['result']) == (2, '3')
+    assert (replies[2]['id'], replies[2]['result']) == (3, '251')
+
+
+def test_server_answers_a_long_last_line_and_closes():
+    async def run():
+        server = CalculatorServer(port=0, max_line=1000)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+            writer.write(b'{"id": 1, "expression": "' + b'1+' * 5000)
+            writer.write_eof()
+            replies = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return replies
+        finally:
+            await server.close()
+
+    assert asyncio.run(run()) == b'{"error": "INVALID REQUEST"}\n'
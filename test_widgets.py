@@ -0,0 +1,134 @@
+import random
+
+from calculator_parser import IncrementalExpression
+from calculator_widgets import DisplayRenderer
+
+
+class FakeText:
+    """The part of tk.Text the renderer uses, recording every edit"""
+
+    def __init__(self):
+        self.text = ""
+        self.edits = []
+
+    def index(self, position):
+        if position == "end":
+            return len(self.text)
+        line, column = map(int, position.split('.'))
+        lines = self.text.split('\n')
+        if line > len(lines):
+            return len(self.text)
+        return sum(len(text) + 1 for text in lines[:line - 1]) + min(column, len(lines[line - 1]))
+
+    def insert(self, position, text, tag=None):
+        at = self.index(position)
+        self.text = self.text[:at] + text + self.text[at:]
+        self.edits.append(('insert', text))
+
+    def delete(self, start, end):
+        first, last = self.index(start), self.index(end)
+        self.edits.append(('delete', self.text[first:last]))
+        self.text = self.text[:first] + self.text[last:]
+
+
+class ManualScheduler:
+    """Keeps idle jobs until the test runs them"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def idle(self, name, callback, *args):
+        self.jobs.setdefault(name, (callback, args))
+
+    def cancel(self, name):
+        self.jobs.pop(name, None)
+
+    def run(self):
+        for callback, args in list(self.jobs.values()):
+            callback(*args)
+
+
+def symbols(equation):
+    return equation.replace('*', '×').replace('/', '÷')
+
+
+def make_renderer():
+    display = FakeText()
+    scheduler = ManualScheduler()
+    return DisplayRenderer(display, symbols, scheduler), display, scheduler
+
+
+def expected(equation, suffix, result):
+    text = symbols(equation) + suffix + '\n' if equation else ""
+    return text + '\n' + result if result else text
+
+
+def test_typing_edits_only_the_new_key():
+    renderer, display, scheduler = make_renderer()
+    typed = IncrementalExpression('12*3')
+    renderer.show(typed)
+    scheduler.run()
+    assert display.text == "12×3\n"
+    display.edits.clear()
+    typed.push('/')
+    renderer.show(typed)
+    scheduler.run()
+    assert display.edits == [('insert', '÷')]
+    typed.pop()
+    renderer.show(typed)
+    scheduler.run()
+    assert display.edits[1:] == [('delete', '÷')]
+    assert display.text == "12×3\n"
+
+
+def test_a_burst_of_keys_is_one_redraw():
+    renderer, display, scheduler = make_renderer()
+    typed = IncrementalExpression()
+    for key in '1+2*3':
+        typed.push(key)
+        renderer.show(typed)
+    assert len(scheduler.jobs) == 1
+    scheduler.run()
+    assert display.edits == [('delete', ''), ('insert', '1+2×3\n')]
+
+
+def test_result_and_message():
+    renderer, display, scheduler = make_renderer()
+    typed = IncrementalExpression('7/2')
+    renderer.show(typed, " =", "3.5")
+    scheduler.run()
+    assert display.text == "7÷2 =\n\n3.5"
+    renderer.show_message("DIVISION BY ZERO")
+    scheduler.run()
+    assert display.text == "DIVISION BY ZERO"
+    # The equation is written out in full again after a message
+    renderer.show(typed)
+    scheduler.run()
+    assert display.text == "7÷2\n"
+
+
+def test_display_matches_a_full_redraw():
+    rng = random.Random(4)
+    renderer, display, scheduler = make_renderer()
+    typed = IncrementalExpression()
+    for _ in range(5000):
+        key = rng.choice("0123456789.+-*/<<C=")
+        if key == '<':
+            typed.pop()
+        elif key == 'C':
+            typed.reset()
+        elif key != '=':
+            typed.push(key)
+        suffix, result = (" =", str(len(typed))) if key == '=' else ("", "")
+        if key == '=' and rng.random() < 0.3:
+            renderer.show_message("SYNTAX ERROR")
+            typed.reset()
+        else:
+            renderer.show(typed, suffix, result)
+        if rng.random() < 0.5:
+            scheduler.run()
+            target = renderer.target
+            if target[3] is not None:
+                assert display.text == target[3]
+            else:
+                assert display.text == expected(typed.equation, suffix, result)